@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Competency Question Index
+
+Materialized view over DyadEvidence for the sparql/cq/*.rq queries.
+Instead of rescanning all DyadEvidence and re-joining pl:derivedFrom at
+query time, the index is built once from the inferred graph and holds:
+
+- per-dyad posting lists: dyad -> [(situation, score, dyad_evidence)]
+- situation -> dyad score tables
+- evidence provenance links: dyad_evidence -> [source evidence]
+
+The CQ answers themselves are derived from these tables once, when the
+index is built or loaded, and served as precomputed lists. The --check
+mode compares
+every CQ answer against the SPARQL result on the same graph.
+
+Usage:
+    python scripts/run_inference.py --index output/cq_index.json
+    python scripts/cq_index.py [--index INDEX_FILE] {cq1,cq2,cq3,cq4,cq5,missing,recon} [-k K]
+    python scripts/cq_index.py --situation s1
+    python scripts/cq_index.py --check [--th THRESHOLD]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.collection import Collection
+from rdflib.namespace import OWL, RDF, RDFS
+
+from run_inference import load_graph, namespaces, run_inference
+
+PL, FSCHEMA = namespaces().PL, namespaces().FSCHEMA
+
+INDEX_VERSION = 1
+
+# CQ name -> query file (relative to sparql/cq/)
+CQ_FILES: Dict[str, str] = {
+    "cq1": "cq1_list_dyads.rq",
+    "cq2": "cq2_components.rq",
+    "cq3": "cq3_explain.rq",
+    "cq4": "cq4_threshold_check.rq",
+    "cq5": "cq5_topk.rq",
+    "missing": "cq_missing_provenance.rq",
+    "recon": "cq_score_reconstruction.rq",
+}
+
+
+def term_key(term) -> Optional[str]:
+    """Convert an RDF term to the string key used by the index."""
+    if term is None:
+        return None
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    return str(term)
+
+
+def term_value(term):
+    """Convert an RDF term to a comparable Python value (Decimal for numeric literals)."""
+    if isinstance(term, Literal):
+        value = term.toPython()
+        if isinstance(value, (Decimal, int, float)) and not isinstance(value, bool):
+            return Decimal(str(term))
+        return str(term)
+    return term_key(term)
+
+
+def local_name(key: str) -> str:
+    """Extract the local name from an index key."""
+    return key.split("#")[-1]
+
+
+@dataclass
+class CQIndex:
+    """Precomputed view over situations, evidence and DyadEvidence."""
+    situations: List[str] = field(default_factory=list)
+    labels: Dict[str, str] = field(default_factory=dict)
+    # evidence node -> (emotion, score)
+    evidence: Dict[str, Tuple[str, Decimal]] = field(default_factory=dict)
+    # situation -> evidence nodes (pl:hasEvidence)
+    situation_evidence: Dict[str, List[str]] = field(default_factory=dict)
+    # situation -> satisfied emotions (pl:satisfies)
+    satisfies: Dict[str, Set[str]] = field(default_factory=dict)
+    dyad_evidence: Set[str] = field(default_factory=set)
+    # dyad_evidence -> source evidence (pl:derivedFrom)
+    provenance: Dict[str, List[str]] = field(default_factory=dict)
+    # dyad -> [(situation, score, dyad_evidence)] sorted by situation, DESC score
+    postings: Dict[str, List[Tuple[str, Decimal, str]]] = field(default_factory=dict)
+    # situation -> {dyad: score}
+    situation_scores: Dict[str, Dict[str, Decimal]] = field(default_factory=dict)
+    # situation -> [(dyad, score)] by DESC score, dyad
+    situation_ranking: Dict[str, List[Tuple[str, Decimal]]] = field(default_factory=dict)
+    # CQ name -> precomputed answer rows (see CQ_FILES)
+    answers: Dict[str, List[tuple]] = field(default_factory=dict)
+    # dyad -> (label, sorted component emotions)
+    components: Dict[str, Tuple[str, List[str]]] = field(default_factory=dict)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def dyads_for(self, situation: str) -> Dict[str, Decimal]:
+        """Dyad score table for a situation."""
+        return self.situation_scores.get(situation, {})
+
+    def situations_for(self, dyad: str) -> List[Tuple[str, Decimal, str]]:
+        """Posting list for a dyad: (situation, score, dyad_evidence)."""
+        return self.postings.get(dyad, [])
+
+    def topk(self, situation: str, k: int = 3) -> List[Tuple[str, Decimal]]:
+        """Top-K dyads for a single situation by score."""
+        return self.situation_ranking.get(situation, [])[:k]
+
+    def resolve_situation(self, name: str) -> Optional[str]:
+        """Resolve a full IRI or local name to a situation key."""
+        if name in self.situation_scores or name in self.situation_evidence:
+            return name
+        for situation in self.situations:
+            if local_name(situation) == name:
+                return situation
+        return None
+
+    # ------------------------------------------------------------------
+    # Competency questions (same columns as sparql/cq/*.rq)
+    # ------------------------------------------------------------------
+
+    def _dyad_rows(self):
+        """Yield (situation, dyad_evidence, dyad, score) for linked DyadEvidence."""
+        for situation in self.situations:
+            for ev in self.situation_evidence.get(situation, []):
+                if ev in self.dyad_evidence and ev in self.evidence:
+                    dyad, score = self.evidence[ev]
+                    yield situation, ev, dyad, score
+
+    def cq1_list_dyads(self) -> List[tuple]:
+        """CQ1: (situation, dyad, score) ordered by situation, dyad."""
+        return self.answers["cq1"]
+
+    def cq2_components(self) -> List[tuple]:
+        """CQ2: (dyad, dyadLabel, component1, component2) ordered by label."""
+        return self.answers["cq2"]
+
+    def cq3_explain(self) -> List[tuple]:
+        """CQ3: (situation, dyad, dyadScore, emotion1, score1, emotion2, score2)."""
+        return self.answers["cq3"]
+
+    def cq4_threshold_check(self) -> List[tuple]:
+        """CQ4: (situation, label, emotion, score) for situations without a dyad."""
+        return self.answers["cq4"]
+
+    def cq5_topk(self, k: int = 3) -> List[tuple]:
+        """CQ5: first K (situation, dyad, score) ordered by situation, DESC score."""
+        return self.answers["cq5"][:k]
+
+    def missing_provenance(self, limit: int = 50) -> List[tuple]:
+        """QC1: DyadEvidence nodes without pl:derivedFrom."""
+        return self.answers["missing"][:limit]
+
+    def score_reconstruction(self, limit: int = 50) -> List[tuple]:
+        """QC2: (dev, dyad, dyadScore, score1, score2, computedMin) mismatches."""
+        return self.answers["recon"][:limit]
+
+    def answer(self, cq: str, k: int = 3) -> List[tuple]:
+        """Answer a CQ by name (see CQ_FILES)."""
+        if cq == "cq5":
+            return self.cq5_topk(k)
+        handlers = {
+            "cq1": self.cq1_list_dyads,
+            "cq2": self.cq2_components,
+            "cq3": self.cq3_explain,
+            "cq4": self.cq4_threshold_check,
+            "missing": self.missing_provenance,
+            "recon": self.score_reconstruction,
+        }
+        return handlers[cq]()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        """Serialize to a JSON-compatible dict (scores as strings)."""
+        return {
+            "version": INDEX_VERSION,
+            "situations": self.situations,
+            "labels": self.labels,
+            "evidence": {ev: [emo, str(score)] for ev, (emo, score) in self.evidence.items()},
+            "situation_evidence": self.situation_evidence,
+            "satisfies": {s: sorted(d) for s, d in self.satisfies.items()},
+            "dyad_evidence": sorted(self.dyad_evidence),
+            "provenance": self.provenance,
+            "components": {d: [label, comps] for d, (label, comps) in self.components.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CQIndex":
+        """Rebuild an index from to_dict() output."""
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {data.get('version')}")
+        index = cls(
+            situations=data["situations"],
+            labels=data["labels"],
+            evidence={ev: (emo, Decimal(score)) for ev, (emo, score) in data["evidence"].items()},
+            situation_evidence=data["situation_evidence"],
+            satisfies={s: set(d) for s, d in data["satisfies"].items()},
+            dyad_evidence=set(data["dyad_evidence"]),
+            provenance=data["provenance"],
+            components={d: (label, comps) for d, (label, comps) in data["components"].items()},
+        )
+        index._build_tables()
+        return index
+
+    def save(self, path: Path) -> None:
+        """Write the index to a JSON file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: Path) -> "CQIndex":
+        """Read an index written by save()."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def _build_tables(self) -> None:
+        """Derive posting lists, score tables and CQ answers from the base maps."""
+        self.postings = {}
+        self.situation_scores = {}
+        cq1, cq3 = [], []
+        for situation, ev, dyad, score in self._dyad_rows():
+            self.postings.setdefault(dyad, []).append((situation, score, ev))
+            table = self.situation_scores.setdefault(situation, {})
+            if dyad not in table or score > table[dyad]:
+                table[dyad] = score
+            if dyad in self.satisfies.get(situation, set()):
+                cq1.append((situation, dyad, score))
+            for e1, s1, e2, s2 in self._source_pairs(ev):
+                if e1 < e2:
+                    cq3.append((situation, dyad, score, e1, s1, e2, s2))
+        for postings in self.postings.values():
+            postings.sort(key=lambda p: (p[0], -p[1]))
+        self.situation_ranking = {
+            situation: sorted(table.items(), key=lambda item: (-item[1], item[0]))
+            for situation, table in self.situation_scores.items()
+        }
+
+        # CQ5 rows are the posting lists merged back in (situation, DESC score) order
+        cq5 = [(situation, dyad, score)
+               for dyad, postings in self.postings.items()
+               for situation, score, _ in postings]
+
+        cq2 = []
+        for dyad, (label, comps) in self.components.items():
+            for i, c1 in enumerate(comps):
+                for c2 in comps[i + 1:]:
+                    cq2.append((dyad, label, c1, c2))
+
+        dyads = set(self.components)
+        cq4 = []
+        for situation in self.situations:
+            if self.satisfies.get(situation, set()) & dyads:
+                continue
+            for ev in self.situation_evidence.get(situation, []):
+                if ev in self.dyad_evidence or ev not in self.evidence:
+                    continue
+                emotion, score = self.evidence[ev]
+                cq4.append((situation, self.labels.get(situation), emotion, score))
+
+        missing = [(ev,) for ev in sorted(self.dyad_evidence) if not self.provenance.get(ev)]
+
+        recon = []
+        for ev in sorted(self.dyad_evidence):
+            if ev not in self.evidence:
+                continue
+            dyad, dyad_score = self.evidence[ev]
+            for _, s1, _, s2 in self._source_pairs(ev):
+                computed = s1 if s1 <= s2 else s2
+                if dyad_score != computed:
+                    recon.append((ev, dyad, dyad_score, s1, s2, computed))
+
+        self.answers = {
+            "cq1": sorted(cq1, key=lambda r: (r[0], r[1])),
+            "cq2": sorted(cq2, key=lambda r: r[1]),
+            "cq3": sorted(cq3, key=lambda r: r[0]),
+            "cq4": sorted(cq4, key=lambda r: (r[0], r[2])),
+            "cq5": sorted(cq5, key=lambda r: (r[0], -r[2])),
+            "missing": missing,
+            "recon": recon,
+        }
+
+    def _source_pairs(self, ev: str):
+        """Yield (emotion1, score1, emotion2, score2) for ordered pairs of distinct sources."""
+        sources = [s for s in self.provenance.get(ev, []) if s in self.evidence]
+        for ev1 in sources:
+            for ev2 in sources:
+                if ev1 != ev2:
+                    e1, s1 = self.evidence[ev1]
+                    e2, s2 = self.evidence[ev2]
+                    yield e1, s1, e2, s2
+
+
+def build_index(g: Graph) -> CQIndex:
+    """Build a CQIndex from a graph that already contains inference results."""
+    index = CQIndex()
+
+    index.situations = sorted(term_key(s) for s in set(g.subjects(RDF.type, FSCHEMA.FrameOccurrence)))
+    for situation in index.situations:
+        label = g.value(URIRef(situation), RDFS.label)
+        if label is not None:
+            index.labels[situation] = str(label)
+
+    for ev, emotion in g.subject_objects(PL.emotion):
+        score = g.value(ev, PL.score)
+        if score is not None:
+            index.evidence[term_key(ev)] = (term_key(emotion), term_value(score))
+
+    for situation, ev in g.subject_objects(PL.hasEvidence):
+        index.situation_evidence.setdefault(term_key(situation), []).append(term_key(ev))
+
+    for situation, emotion in g.subject_objects(PL.satisfies):
+        index.satisfies.setdefault(term_key(situation), set()).add(term_key(emotion))
+
+    for ev in g.subjects(RDF.type, PL.DyadEvidence):
+        index.dyad_evidence.add(term_key(ev))
+
+    for ev, source in g.subject_objects(PL.derivedFrom):
+        index.provenance.setdefault(term_key(ev), []).append(term_key(source))
+
+    for dyad in set(g.subjects(RDFS.subClassOf, PL.PlutchikDyad)):
+        label = g.value(dyad, RDFS.label)
+        if label is None:
+            continue
+        comps: Set[str] = set()
+        for equiv in g.objects(dyad, OWL.equivalentClass):
+            for members in g.objects(equiv, OWL.intersectionOf):
+                for restr in Collection(g, members):
+                    if (restr, OWL.onProperty, PL.hasComponentEmotion) in g:
+                        comps.update(term_key(c) for c in g.objects(restr, OWL.someValuesFrom))
+        index.components[term_key(dyad)] = (str(label), sorted(comps))
+
+    index._build_tables()
+    return index
+
+
+def run_sparql_cq(g: Graph, query_path: Path) -> List[tuple]:
+    """Run a CQ query file and normalize its rows to index values."""
+    results = g.query(query_path.read_text(encoding="utf-8"))
+    return [tuple(term_value(v) for v in row) for row in results]
+
+
+def check_consistency(g: Graph, index: CQIndex, cq_dir: Path) -> bool:
+    """
+    Compare each CQ answer from the index with the SPARQL result.
+    Rows are compared as sorted multisets, since ties in ORDER BY are
+    not ordered deterministically.
+    """
+    print("\n" + "=" * 70)
+    print("CQ Index Consistency Check")
+    print("=" * 70)
+    print(f"{'CQ':<10} {'Rows':<8} {'SPARQL (ms)':<14} {'Index (ms)':<14} {'Result':<8}")
+    print("-" * 70)
+
+    all_passed = True
+    for cq, filename in CQ_FILES.items():
+        start = time.perf_counter()
+        expected = run_sparql_cq(g, cq_dir / filename)
+        sparql_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        actual = index.answer(cq)
+        index_ms = (time.perf_counter() - start) * 1000
+
+        passed = sorted(expected, key=repr) == sorted(actual, key=repr)
+        all_passed = all_passed and passed
+        status = "PASS" if passed else "FAIL"
+        print(f"{cq:<10} {len(expected):<8} {sparql_ms:<14.3f} {index_ms:<14.3f} {status:<8}")
+        if not passed:
+            print(f"  SPARQL: {expected}")
+            print(f"  Index:  {actual}")
+
+    print("-" * 70)
+    print("All CQ answers match SPARQL!" if all_passed else "Some CQ answers differ from SPARQL!")
+    return all_passed
+
+
+def format_value(value) -> str:
+    """Format an index value for display."""
+    if value is None:
+        return "-"
+    if isinstance(value, Decimal):
+        return str(value)
+    return local_name(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Competency Question Index")
+    parser.add_argument("cq", nargs="?", choices=sorted(CQ_FILES), help="CQ to answer from the index")
+    parser.add_argument("--index", type=str, default="output/cq_index.json", help="Index file path")
+    parser.add_argument("-k", type=int, default=3, help="K for top-K (default: 3)")
+    parser.add_argument("--situation", type=str, help="Show dyad score table for a situation")
+    parser.add_argument("--check", action="store_true",
+                        help="Run inference, build the index and compare against SPARQL")
+    parser.add_argument("--th", type=float, default=0.4, help="Threshold for --check (default: 0.4)")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+
+    if args.check:
+        with contextlib.redirect_stdout(io.StringIO()):
+            g = load_graph(base_dir)
+            run_inference(g, Decimal(str(args.th)))
+        start = time.perf_counter()
+        index = build_index(g)
+        print(f"Index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+        sys.exit(0 if check_consistency(g, index, base_dir / "sparql" / "cq") else 1)
+
+    index_path = Path(args.index)
+    if not index_path.is_absolute():
+        index_path = base_dir / args.index
+    if not index_path.exists():
+        print(f"Error: Index not found: {index_path}")
+        print("Build it with: python scripts/run_inference.py --index output/cq_index.json")
+        sys.exit(2)
+    index = CQIndex.load(index_path)
+
+    if args.situation:
+        situation = index.resolve_situation(args.situation)
+        if situation is None:
+            print(f"Error: Unknown situation: {args.situation}")
+            sys.exit(2)
+        for dyad, score in index.topk(situation, args.k):
+            print(f"{local_name(dyad)}\t{score}")
+        return
+
+    if not args.cq:
+        parser.error("a CQ name, --situation or --check is required")
+
+    for row in index.answer(args.cq, args.k):
+        print("\t".join(format_value(v) for v in row))
+
+
+if __name__ == "__main__":
+    main()
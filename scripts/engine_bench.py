@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Differential Inference Engine Benchmark
+
+Runs the three implementations of dyad inference on generated corpora of
+increasing size, checks that their outputs agree, and reports throughput
+and memory:
+- python   run_inference.run_inference (infer_dyads + materialize_inference)
+- rdflib   the ten sparql/dyad_rules/*.rq CONSTRUCT rules, run in rdflib
+- fuseki   the same rules over the SPARQL protocol against a dedicated
+           Fuseki dataset (run_fuseki.sh bench). Each corpus replaces the
+           named graph urn:bench, which the rules query as their default
+           graph; it is dropped afterwards. The efo dataset is never touched.
+           When no endpoint answers, a local stand-in (rdflib behind the
+           same HTTP protocol) is started in-process.
+
+Outputs are compared with rdflib.compare.isomorphic (blank nodes are
+matched structurally). Simple literals are normalized to xsd:string first,
+as in RDF 1.1, since the rules write "min-threshold" without a datatype.
+
+Corpora have one pl:Evidence per (situation, emotion), 2-4 emotions per
+situation, scores 0.00-1.00. The rules hard-code the 0.4 threshold, so
+the Python engine runs at 0.4 too.
+
+An engine that exceeds --budget seconds at one size is skipped for larger
+sizes (the rules join evidence pairs with nested loops in rdflib).
+
+Usage:
+    python scripts/engine_bench.py [--sizes 25 100 400 1600] [--budget 30]
+                                   [--fuseki-url URL] [--no-memory] [--csv output/engine_bench.csv]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.error import URLError
+from urllib.parse import parse_qs, quote, urlencode, urlsplit
+from urllib.request import Request, urlopen
+
+from rdflib import Graph, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, XSD
+
+from run_inference import DYADS, namespaces, run_inference
+
+EX, FSCHEMA, PL = namespaces().EX, namespaces().FSCHEMA, namespaces().PL
+
+RULE_THRESHOLD = Decimal("0.4")
+EMOTIONS = sorted({e for pair in DYADS.values() for e in pair})
+NTRIPLES = "application/n-triples"
+DEFAULT_FUSEKI_URL = os.environ.get("FUSEKI_URL", "http://localhost:3030") + "/efo_bench"
+BENCH_GRAPH = "urn:bench"
+
+
+@dataclass
+class EngineResult:
+    """One engine run on one corpus."""
+    engine: str
+    size: int
+    seconds: float
+    peak_kb: float
+    triples: int
+    agrees: Optional[bool] = None  # vs the reference engine (python)
+    skipped: str = ""
+
+
+def generate_corpus(n: int, seed: int = 0) -> Graph:
+    """n FrameOccurrences with 2-4 scored Evidence nodes each (distinct emotions)."""
+    rng = random.Random(seed)
+    g = Graph()
+    for i in range(n):
+        situation = EX[f"gen{i}"]
+        g.add((situation, RDF.type, FSCHEMA.FrameOccurrence))
+        for emotion in rng.sample(EMOTIONS, rng.randint(2, 4)):
+            ev = EX[f"gen{i}_ev_{emotion.lower()}"]
+            g.add((situation, PL.hasEvidence, ev))
+            g.add((ev, RDF.type, PL.Evidence))
+            g.add((ev, PL.emotion, PL[emotion]))
+            g.add((ev, PL.score, Literal(f"{rng.randint(0, 100) / 100:.2f}", datatype=XSD.decimal)))
+    return g
+
+
+def normalize(g: Graph) -> Graph:
+    """Copy of g with simple literals typed as xsd:string (RDF 1.1 equivalence)."""
+    out = Graph()
+    for s, p, o in g:
+        if isinstance(o, Literal) and o.datatype is None and o.language is None:
+            o = Literal(str(o), datatype=XSD.string)
+        out.add((s, p, o))
+    return out
+
+
+def load_rules(rules_dir: Path) -> List[str]:
+    return [p.read_text(encoding="utf-8") for p in sorted(rules_dir.glob("*.rq"))]
+
+
+# ----------------------------------------------------------------------
+# Engines: each takes the corpus and returns the inferred triples only
+# ----------------------------------------------------------------------
+
+def python_engine(data: Graph) -> Graph:
+    g = Graph()
+    g += data
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_inference(g, RULE_THRESHOLD)
+    return g - data
+
+
+def rdflib_engine(rules: List[str]) -> Callable[[Graph], Graph]:
+    def run(data: Graph) -> Graph:
+        out = Graph()
+        for rule in rules:
+            out += data.query(rule).graph
+        return out
+    return run
+
+
+class SparqlEndpoint:
+    """
+    Minimal SPARQL protocol + graph store client for one named graph of a
+    dataset; queries see that graph as their default graph.
+    """
+
+    def __init__(self, dataset_url: str, graph: str = BENCH_GRAPH, timeout: float = 600.0):
+        self.dataset_url = dataset_url.rstrip("/")
+        self.graph = graph
+        self.timeout = timeout
+
+    def ping(self) -> bool:
+        try:
+            self.construct("CONSTRUCT WHERE { ?s ?p ?o } LIMIT 1", timeout=2.0)
+            return True
+        except (URLError, OSError, ValueError):
+            return False
+
+    def _graph_url(self) -> str:
+        return f"{self.dataset_url}/data?graph={quote(self.graph, safe='')}"
+
+    def replace_data(self, g: Graph) -> None:
+        """PUT the bench graph."""
+        body = g.serialize(format="nt", encoding="utf-8")
+        request = Request(self._graph_url(), data=body, method="PUT",
+                          headers={"Content-Type": NTRIPLES})
+        with urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def drop(self) -> None:
+        """DELETE the bench graph (a missing graph is not an error)."""
+        try:
+            with urlopen(Request(self._graph_url(), method="DELETE"), timeout=self.timeout) as response:
+                response.read()
+        except URLError:
+            pass
+
+    def construct(self, query: str, timeout: Optional[float] = None) -> Graph:
+        body = urlencode({"query": query, "default-graph-uri": self.graph}).encode("utf-8")
+        request = Request(f"{self.dataset_url}/sparql", data=body, method="POST", headers={
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept": NTRIPLES,
+        })
+        with urlopen(request, timeout=timeout or self.timeout) as response:
+            g = Graph()
+            g.parse(data=response.read().decode("utf-8"), format="nt")
+            return g
+
+
+def endpoint_engine(endpoint: SparqlEndpoint, rules: List[str]) -> Callable[[Graph], Graph]:
+    def run(data: Graph) -> Graph:
+        out = Graph()
+        for rule in rules:
+            out += endpoint.construct(rule)
+        return out
+    return run
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Fuseki stand-in: PUT/DELETE /<ds>/data?graph=IRI and POST /<ds>/sparql
+    (with default-graph-uri) over rdflib graphs.
+    """
+
+    graphs: Dict[str, Graph]
+
+    def do_PUT(self):
+        name = self._graph_param()
+        if name is None:
+            return
+        g = Graph()
+        g.parse(data=self._body(), format="nt")
+        self.graphs[name] = g
+        self._send(204, b"")
+
+    def do_DELETE(self):
+        name = self._graph_param()
+        if name is None:
+            return
+        self.graphs.pop(name, None)
+        self._send(204, b"")
+
+    def do_POST(self):
+        if not self.path.split("?")[0].endswith("/sparql"):
+            self._send(404, b"not found")
+            return
+        content_type = self.headers.get("Content-Type", "")
+        body = self._body()
+        params = parse_qs(urlsplit(self.path).query)
+        if content_type.startswith("application/sparql-query"):
+            query = body
+        else:
+            params.update(parse_qs(body))
+            query = params["query"][0]
+        default_graph = params.get("default-graph-uri", [""])[0]
+        result = self.graphs.get(default_graph, Graph()).query(query)
+        if result.graph is not None:
+            payload = result.graph.serialize(format="nt", encoding="utf-8")
+        else:
+            payload = Graph().serialize(format="nt", encoding="utf-8")
+        self._send(200, payload, NTRIPLES)
+
+    def _graph_param(self) -> Optional[str]:
+        """Graph IRI of a graph store request; answers 404/400 and returns None otherwise."""
+        url = urlsplit(self.path)
+        if not url.path.endswith("/data"):
+            self._send(404, b"not found")
+            return None
+        names = parse_qs(url.query).get("graph")
+        if not names:
+            self._send(400, b"only ?graph=IRI is supported")
+            return None
+        return names[0]
+
+    def _body(self) -> str:
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length).decode("utf-8")
+
+    def _send(self, status: int, payload: bytes, content_type: str = "text/plain") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in() -> ThreadingHTTPServer:
+    handler = type("BoundStandInHandler", (StandInHandler,), {"graphs": {}})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ----------------------------------------------------------------------
+# Harness
+# ----------------------------------------------------------------------
+
+def measure(engine: Callable[[Graph], Graph], data: Graph, trace_budget: Optional[float]):
+    """
+    Run an engine; return (output graph, seconds, peak allocation KB).
+    tracemalloc slows allocation-heavy code several times over, so time is
+    taken from an untraced run and peak memory from a second, traced run,
+    made only if the first took at most trace_budget seconds (else 0.0).
+    """
+    start = time.perf_counter()
+    out = engine(data)
+    elapsed = time.perf_counter() - start
+    if trace_budget is None or elapsed > trace_budget:
+        return out, elapsed, 0.0
+    tracemalloc.start()
+    engine(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak / 1024
+
+
+def run_benchmark(engines: Dict[str, Callable[[Graph], Graph]], sizes: List[int], budget: float,
+                  seed: int, setup: Dict[str, Callable[[Graph], None]],
+                  trace_memory: bool = True) -> List[EngineResult]:
+    """Run every engine on every size; the first engine is the reference."""
+    results: List[EngineResult] = []
+    over_budget: Dict[str, int] = {}
+    reference_name = next(iter(engines))
+
+    for size in sizes:
+        data = generate_corpus(size, seed)
+        reference: Optional[Graph] = None
+        for name, engine in engines.items():
+            if name in over_budget:
+                results.append(EngineResult(name, size, 0.0, 0.0, 0,
+                                            skipped=f"over budget at {over_budget[name]}"))
+                print_result(results[-1])
+                continue
+            if name in setup:
+                setup[name](data)
+            out, seconds, peak_kb = measure(engine, data, budget if trace_memory else None)
+            result = EngineResult(name, size, seconds, peak_kb, len(out))
+            out = normalize(out)
+            if name == reference_name:
+                reference = out
+            elif reference is not None:
+                result.agrees = isomorphic(reference, out)
+            results.append(result)
+            print_result(result)
+            if seconds > budget:
+                over_budget[name] = size
+    return results
+
+
+def print_header() -> None:
+    print(f"{'Size':<7} {'Engine':<16} {'Time (s)':<10} {'Sit/s':<10} {'Triples':<9} "
+          f"{'Peak (KB)':<11} {'Agrees':<8}")
+    print("-" * 76)
+
+
+def print_result(r: EngineResult) -> None:
+    if r.skipped:
+        print(f"{r.size:<7} {r.engine:<16} skipped ({r.skipped})", flush=True)
+        return
+    rate = r.size / r.seconds if r.seconds else float("inf")
+    peak = f"{r.peak_kb:.0f}" if r.peak_kb else "-"
+    agrees = "-" if r.agrees is None else ("PASS" if r.agrees else "FAIL")
+    print(f"{r.size:<7} {r.engine:<16} {r.seconds:<10.3f} {rate:<10.0f} {r.triples:<9} "
+          f"{peak:<11} {agrees:<8}", flush=True)
+
+
+def export_csv(results: List[EngineResult], output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["size", "engine", "seconds", "situations_per_s", "triples", "peak_kb", "agrees", "skipped"])
+        for r in results:
+            rate = f"{r.size / r.seconds:.1f}" if r.seconds else ""
+            writer.writerow([r.size, r.engine, f"{r.seconds:.4f}", rate, r.triples,
+                             f"{r.peak_kb:.0f}", "" if r.agrees is None else r.agrees, r.skipped])
+    print(f"\nResults exported to: {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential benchmark of the dyad inference engines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 100, 400, 1600],
+                        help="Corpus sizes in situations (default: 25 100 400 1600)")
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="Skip larger sizes for an engine slower than this (s, default: 30)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed (default: 0)")
+    parser.add_argument("--engines", nargs="+", choices=["python", "rdflib", "fuseki"],
+                        default=["python", "rdflib", "fuseki"], help="Engines to run")
+    parser.add_argument("--fuseki-url", type=str, default=DEFAULT_FUSEKI_URL,
+                        help=f"Fuseki dataset URL (default: {DEFAULT_FUSEKI_URL})")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the traced run that measures peak memory")
+    parser.add_argument("--csv", type=str, help="Export results to CSV file")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+    rules = load_rules(base_dir / "sparql" / "dyad_rules")
+    if len(rules) != len(DYADS):
+        print(f"Error: expected {len(DYADS)} rules in sparql/dyad_rules, found {len(rules)}")
+        sys.exit(2)
+
+    print("Differential Engine Benchmark")
+    print("=" * 76)
+
+    # python is always the reference for the agreement check
+    engines: Dict[str, Callable[[Graph], Graph]] = {"python": python_engine}
+    if "rdflib" in args.engines:
+        engines["rdflib"] = rdflib_engine(rules)
+
+    setup: Dict[str, Callable[[Graph], None]] = {}
+    server = None
+    endpoint = None
+    if "fuseki" in args.engines:
+        endpoint = SparqlEndpoint(args.fuseki_url)
+        name = "fuseki"
+        if not endpoint.ping():
+            server = start_stand_in()
+            host, port = server.server_address
+            endpoint = SparqlEndpoint(f"http://{host}:{port}/efo_bench")
+            name = "fuseki-standin"
+            print(f"Fuseki not reachable at {args.fuseki_url}; using a local stand-in (rdflib over HTTP)")
+        else:
+            print(f"Fuseki: {args.fuseki_url} (graph <{BENCH_GRAPH}> is replaced per corpus)")
+        engines[name] = endpoint_engine(endpoint, rules)
+        setup[name] = endpoint.replace_data
+
+    print(f"Sizes: {args.sizes}, threshold: {RULE_THRESHOLD}, budget: {args.budget:.0f} s per run")
+    print("(Time: untraced run. Peak: Python allocations in this process, from a second")
+    print(" traced run; a real Fuseki server's own memory is not included)")
+    print()
+
+    # Warm up rdflib's SPARQL machinery so the first engine does not pay for it
+    Graph().query("ASK { ?s ?p ?o }")
+
+    print_header()
+    try:
+        results = run_benchmark(engines, args.sizes, args.budget, args.seed, setup, not args.no_memory)
+    finally:
+        if endpoint is not None:
+            endpoint.drop()
+        if server is not None:
+            server.shutdown()
+
+    if args.csv:
+        export_csv(results, Path(args.csv) if Path(args.csv).is_absolute() else base_dir / args.csv)
+
+    disagreements = [r for r in results if r.agrees is False]
+    print()
+    print("All engines agree!" if not disagreements else "Engine outputs differ!")
+    sys.exit(0 if not disagreements else 1)
+
+
+if __name__ == "__main__":
+    main()
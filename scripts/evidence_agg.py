@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Evidence Deduplication / Aggregation
+
+When a situation receives evidence for the same emotion from many
+annotators and models, this ingest stage folds the rows into one value per
+(situation, emotion) before anything reaches the graph:
+    max        highest score (default; what get_evidence_for_frame keeps)
+    mean       arithmetic mean
+    noisy-or   1 - prod(1 - score)
+
+Each (situation, emotion) keeps a constant-size accumulator: count, sum,
+noisy-or complement and the --keep highest-scoring source evidence. The
+highest-scoring source is the winner. With max the winner is written as
+the pair's pl:Evidence as is; with mean and noisy-or an aggregated
+pl:Evidence node carries the aggregated score instead. The winner and the
+bounded source list are cited in a JSON Lines provenance file, not in the
+graph: pl:derivedFrom is reserved for DyadEvidence (see
+shacl/plutchik-dyad-shapes.ttl).
+
+Memory is bounded in one of two ways:
+    --sorted         input sorted by situation ID: one situation in memory
+    --partitions N   unsorted input: rows are hash-partitioned by situation
+                     into N spill files, each aggregated on its own
+                     (default 1: one in-memory table of accumulators)
+
+Input (JSON Lines, one evidence row per line):
+    {"situation": "http://example.org/data#s1", "evidence": "http://example.org/data#s1_a1_joy",
+     "emotion": "Joy", "score": 0.8}
+Blank nodes are written as "_:id". Scores must lie in [0, 1].
+RDF input (.ttl/.nt) is read from its pl:hasEvidence links (DyadEvidence
+is skipped).
+
+Usage:
+    python scripts/evidence_agg.py INPUT [--agg max|mean|noisy-or] [--sorted | --partitions N]
+                                   [--out output/evidence_agg.nt] [--infer] [--th 0.4]
+    python scripts/evidence_agg.py --synthetic 10000 --dups 24 --agg noisy-or --sorted
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+AGGREGATORS = ("max", "mean", "noisy-or")
+DEFAULT_KEEP = 3
+SCORE_QUANTUM = Decimal("0.01")
+ZERO = Decimal(0)
+ONE = Decimal(1)
+
+# (situation, evidence, emotion local name, score); blank nodes as "_:id"
+Row = Tuple[str, str, str, Decimal]
+
+
+def term_key(term) -> str:
+    """Row form of an rdflib subject: the IRI, or "_:id" for a blank node."""
+    from rdflib import BNode
+
+    return f"_:{term}" if isinstance(term, BNode) else str(term)
+
+
+def key_term(key: str):
+    """Inverse of term_key."""
+    from rdflib import BNode, URIRef
+
+    return BNode(key[2:]) if key.startswith("_:") else URIRef(key)
+
+
+def check_score(score: Decimal) -> Decimal:
+    """Reject scores that are not finite or outside [0, 1]."""
+    if not score.is_finite() or not ZERO <= score <= ONE:
+        raise ValueError(f"score out of range [0, 1]: {score}")
+    return score
+
+
+@dataclass
+class EvidenceAccumulator:
+    """Constant-size aggregation state for one (situation, emotion)."""
+    keep: int = DEFAULT_KEEP
+    count: int = 0
+    total: Decimal = Decimal(0)
+    complement: Decimal = ONE
+    sources: List[Tuple[Decimal, str]] = field(default_factory=list)  # best first
+
+    def add(self, evidence: str, score: Decimal) -> None:
+        check_score(score)
+        self.count += 1
+        self.total += score
+        self.complement *= ONE - score
+        if len(self.sources) < self.keep or score > self.sources[-1][0]:
+            # Ties keep the earlier row, as get_evidence_for_frame does
+            pos = len(self.sources)
+            while pos > 0 and score > self.sources[pos - 1][0]:
+                pos -= 1
+            self.sources.insert(pos, (score, evidence))
+            del self.sources[self.keep:]
+
+    @property
+    def winner(self) -> str:
+        """The highest-scoring source evidence."""
+        return self.sources[0][1]
+
+    def value(self, method: str) -> Decimal:
+        """Aggregated score (mean and noisy-or are quantized to 0.01)."""
+        if method == "max":
+            return self.sources[0][0]
+        if method == "mean":
+            return (self.total / self.count).quantize(SCORE_QUANTUM)
+        if method == "noisy-or":
+            return (ONE - self.complement).quantize(SCORE_QUANTUM)
+        raise ValueError(f"Unknown aggregation method: {method}")
+
+
+Situation = Tuple[str, Dict[str, EvidenceAccumulator]]
+
+
+def emotion_name(emotion: str) -> str:
+    """Local name of an emotion IRI (local names pass through)."""
+    return emotion.rsplit("#", 1)[-1]
+
+
+def aggregate_sorted(rows: Iterable[Row], keep: int = DEFAULT_KEEP) -> Iterator[Situation]:
+    """
+    Aggregate rows sorted by situation ID, holding one situation at a time.
+    Out-of-order input is rejected (the check needs constant memory).
+    """
+    current: Optional[str] = None
+    accumulators: Dict[str, EvidenceAccumulator] = {}
+    for situation, evidence, emotion, score in rows:
+        if situation != current:
+            if current is not None:
+                if situation < current:
+                    raise ValueError(f"input is not sorted by situation: {situation} "
+                                     f"follows {current} (drop --sorted)")
+                yield current, accumulators
+            current, accumulators = situation, {}
+        acc = accumulators.get(emotion)
+        if acc is None:
+            acc = accumulators[emotion] = EvidenceAccumulator(keep)
+        acc.add(evidence, score)
+    if current is not None:
+        yield current, accumulators
+
+
+def aggregate_table(rows: Iterable[Row], keep: int = DEFAULT_KEEP) -> Iterator[Situation]:
+    """Aggregate unsorted rows in one hash table of accumulators."""
+    table: Dict[str, Dict[str, EvidenceAccumulator]] = {}
+    for situation, evidence, emotion, score in rows:
+        accumulators = table.get(situation)
+        if accumulators is None:
+            accumulators = table[situation] = {}
+        acc = accumulators.get(emotion)
+        if acc is None:
+            acc = accumulators[emotion] = EvidenceAccumulator(keep)
+        acc.add(evidence, score)
+    yield from table.items()
+
+
+def aggregate_partitioned(rows: Iterable[Row], partitions: int, keep: int = DEFAULT_KEEP,
+                          tmp_dir: Optional[str] = None) -> Iterator[Situation]:
+    """
+    Aggregate unsorted rows by spilling them to hash partitions of the
+    situation, then aggregating each partition's table in turn.
+    """
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as spill_dir:
+        paths = [os.path.join(spill_dir, f"part{i}.tsv") for i in range(partitions)]
+        files = [open(p, "w", encoding="utf-8") for p in paths]
+        try:
+            for situation, evidence, emotion, score in rows:
+                part = zlib.crc32(situation.encode("utf-8")) % partitions
+                files[part].write(f"{situation}\t{evidence}\t{emotion}\t{score}\n")
+        finally:
+            for f in files:
+                f.close()
+
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                spilled = (line.rstrip("\n").split("\t") for line in f)
+                yield from aggregate_table(
+                    ((s, ev, em, Decimal(sc)) for s, ev, em, sc in spilled), keep)
+
+
+def read_rows(path: str) -> Iterator[Row]:
+    """Yield evidence rows from a JSON Lines file ('-' for stdin)."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            missing = [k for k in ("situation", "evidence", "emotion", "score") if k not in record]
+            if missing:
+                raise ValueError(f"line {line_no}: missing {', '.join(missing)}")
+            try:
+                score = Decimal(str(record["score"]))
+            except InvalidOperation:
+                raise ValueError(f"line {line_no}: score is not a number: {record['score']!r}")
+            yield (str(record["situation"]), str(record["evidence"]),
+                   emotion_name(str(record["emotion"])), score)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def graph_rows(path: Path) -> Iterator[Row]:
+    """Yield basic evidence rows from an RDF file, sorted by situation."""
+    from rdflib import Graph
+    from rdflib.namespace import RDF
+
+    from run_inference import namespaces
+
+    FSCHEMA, PL = namespaces().FSCHEMA, namespaces().PL
+    g = Graph()
+    g.parse(path, format="nt" if path.suffix == ".nt" else "turtle")
+    for situation in sorted(set(g.subjects(RDF.type, FSCHEMA.FrameOccurrence)), key=term_key):
+        for ev in g.objects(situation, PL.hasEvidence):
+            if (ev, RDF.type, PL.DyadEvidence) in g:
+                continue
+            for emotion in g.objects(ev, PL.emotion):
+                for score in g.objects(ev, PL.score):
+                    try:
+                        value = Decimal(str(score))
+                    except InvalidOperation:
+                        raise ValueError(f"score of {term_key(ev)} is not a number: {score!r}")
+                    yield term_key(situation), term_key(ev), emotion_name(str(emotion)), value
+
+
+def synthetic_rows(n: int, dups: int, seed: int = 0) -> Iterator[Row]:
+    """n situations, 2-4 emotions each, dups rows per emotion, sorted by situation."""
+    from run_inference import DYADS
+
+    emotions = sorted({e for pair in DYADS.values() for e in pair})
+    rng = random.Random(seed)
+    for i in range(n):
+        situation = f"http://example.org/data#agg{i:08d}"
+        for emotion in rng.sample(emotions, rng.randint(2, 4)):
+            for j in range(dups):
+                yield (situation, f"{situation}_src{j}_{emotion.lower()}", emotion,
+                       Decimal(rng.randint(0, 100)) / 100)
+
+
+def write_aggregated(situations: Iterable[Situation], method: str, writer,
+                     provenance=None, threshold: Optional[Decimal] = None) -> Dict[str, int]:
+    """
+    Write one pl:Evidence per (situation, emotion), and optionally the
+    DyadEvidence inferred from it; the winning sources are cited in the
+    provenance file. Returns counters.
+    """
+    from rdflib import BNode, Literal, URIRef
+    from rdflib.namespace import RDF, XSD
+
+    from run_inference import infer_dyads, namespaces
+
+    FSCHEMA, PL = namespaces().FSCHEMA, namespaces().PL
+    stats = {"situations": 0, "rows": 0, "evidence": 0, "dyads": 0}
+    for situation_id, accumulators in situations:
+        situation = key_term(situation_id)
+        writer.write_triple(situation, RDF.type, FSCHEMA.FrameOccurrence)
+
+        evidence_map = {}
+        for name, acc in accumulators.items():
+            score = acc.value(method)
+            if method == "max":
+                ev = key_term(acc.winner)
+            elif isinstance(situation, URIRef):
+                ev = URIRef(f"{situation}_{method}_{name.lower()}")
+            else:
+                ev = BNode()
+            writer.write_triple(situation, PL.hasEvidence, ev)
+            writer.write_triple(ev, RDF.type, PL.Evidence)
+            writer.write_triple(ev, PL.emotion, PL[name])
+            writer.write_triple(ev, PL.score, Literal(score, datatype=XSD.decimal))
+            evidence_map[name] = (ev, score)
+            stats["rows"] += acc.count
+            if provenance is not None:
+                provenance.write(json.dumps({
+                    "situation": situation_id, "emotion": name, "evidence": term_key(ev),
+                    "winner": acc.winner, "method": method, "score": str(score), "count": acc.count,
+                    "sources": [[ev_id, str(s)] for s, ev_id in acc.sources],
+                }) + "\n")
+        stats["situations"] += 1
+        stats["evidence"] += len(evidence_map)
+
+        if threshold is not None:
+            inferred = infer_dyads(None, situation, evidence_map, threshold)
+            writer.write_situation(situation, [
+                (PL[dyad_name], dyad_score, ev1, ev2, BNode())
+                for dyad_name, dyad_score, ev1, ev2 in inferred
+            ])
+            stats["dyads"] += len(inferred)
+    return stats
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evidence deduplication / aggregation")
+    parser.add_argument("input", nargs="?", help="JSON Lines rows ('-' for stdin) or an RDF file")
+    parser.add_argument("--agg", choices=AGGREGATORS, default="max", help="Aggregation (default: max)")
+    parser.add_argument("--keep", type=positive_int, default=DEFAULT_KEEP,
+                        help=f"Source evidence kept per (situation, emotion) (default: {DEFAULT_KEEP})")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--sorted", action="store_true", help="Input is sorted by situation ID")
+    mode.add_argument("--partitions", type=positive_int, default=1,
+                      help="Hash partitions spilled to disk for unsorted input (default: 1, in memory)")
+    parser.add_argument("--out", type=str, default="output/evidence_agg.nt",
+                        help="Output path (.ttl, .nt, optionally .gz)")
+    parser.add_argument("--provenance", type=str, default="output/evidence_provenance.jsonl",
+                        help="Provenance pointer list (JSON Lines; 'none' to skip)")
+    parser.add_argument("--infer", action="store_true", help="Also infer dyads from the aggregated evidence")
+    parser.add_argument("--th", type=float, default=0.4, help="Threshold for --infer (default: 0.4)")
+    parser.add_argument("--synthetic", type=int, help="Generate N situations instead of reading input")
+    parser.add_argument("--dups", type=positive_int, default=24, help="Rows per (situation, emotion) for --synthetic (default: 24)")
+    parser.add_argument("--trace", action="store_true", help="Report peak allocation (tracemalloc; slower)")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+
+    def resolve(p: str) -> Path:
+        return Path(p) if Path(p).is_absolute() else base_dir / p
+
+    if args.synthetic:
+        rows = synthetic_rows(args.synthetic, args.dups)
+        source = f"synthetic ({args.synthetic} situations x {args.dups} rows per emotion)"
+    elif args.input == "-" or (args.input and args.input.endswith(".jsonl")):
+        rows = read_rows(args.input if args.input == "-" else str(resolve(args.input)))
+        source = args.input
+    elif args.input:
+        if not resolve(args.input).exists():
+            print(f"Error: Input file not found: {resolve(args.input)}")
+            sys.exit(2)
+        rows = graph_rows(resolve(args.input))
+        source = args.input
+    else:
+        parser.error("needs an INPUT file or --synthetic N")
+
+    if args.sorted:
+        situations, mode_str = aggregate_sorted(rows, args.keep), "sorted stream"
+    elif args.partitions > 1:
+        situations = aggregate_partitioned(rows, args.partitions, args.keep)
+        mode_str = f"{args.partitions} hash partitions"
+    else:
+        situations, mode_str = aggregate_table(rows, args.keep), "hash table"
+
+    from stream_writer import StreamingWriter
+    from run_inference import NAMESPACE_IRIS
+
+    out_path = resolve(args.out)
+    namespaces = [("pl", NAMESPACE_IRIS["PL"]), ("ex", NAMESPACE_IRIS["EX"]),
+                  ("fschema", NAMESPACE_IRIS["FSCHEMA"]),
+                  ("rdf", "http://www.w3.org/1999/02/22-rdf-syntax-ns#"),
+                  ("xsd", "http://www.w3.org/2001/XMLSchema#")]
+    threshold = Decimal(str(args.th)) if args.infer else None
+
+    print("Evidence Aggregation")
+    print(f"Input: {source}")
+    print(f"Method: {args.agg}, mode: {mode_str}, keep: {args.keep}")
+    print("-" * 50)
+
+    provenance_path = None if args.provenance == "none" else resolve(args.provenance)
+    if args.trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with StreamingWriter(out_path, namespaces) as writer:
+            if provenance_path is not None:
+                provenance_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(provenance_path, "w", encoding="utf-8") as provenance:
+                    stats = write_aggregated(situations, args.agg, writer, provenance, threshold)
+            else:
+                stats = write_aggregated(situations, args.agg, writer, None, threshold)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    elapsed = time.perf_counter() - start
+
+    print(f"Rows: {stats['rows']}, situations: {stats['situations']}, "
+          f"evidence written: {stats['evidence']}, dyads: {stats['dyads']}")
+    print(f"Triples written: {writer.count} to {out_path}")
+    if provenance_path is not None:
+        print(f"Provenance written to: {provenance_path}")
+    print(f"Throughput: {stats['rows'] / elapsed if elapsed else 0:.0f} rows/s")
+    if args.trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Peak allocation: {peak / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
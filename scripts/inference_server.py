@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Plutchik Dyad Inference Server
+
+Long-running local HTTP service that keeps the ontology graph (EmoCore,
+PlutchikDyad module, optional EFO-BE/BET) and the compiled dyad table
+resident, so scoring a batch of new situations does not pay Python startup,
+rdflib import and ontology parsing on every call.
+
+Endpoints:
+    GET  /health   Server status
+    POST /infer    Score a batch of situations (JSON or N-Triples body)
+
+JSON request body:
+    {"threshold": 0.4,
+     "situations": [{"id": "http://example.org/data#s1",
+                     "evidence": [{"id": "http://example.org/data#s1_ev_joy",
+                                   "emotion": "Joy", "score": 0.8}, ...]}]}
+
+Situation and evidence ids must be absolute IRIs (evidence ids are optional).
+N-Triples request bodies (Content-Type: application/n-triples) use the same
+vocabulary as data/sample.ttl. Responses are JSON, or N-Triples with
+DyadEvidence nodes when the request sends Accept: application/n-triples.
+
+Usage:
+    python scripts/inference_server.py [--host HOST] [--port PORT] [--th THRESHOLD]
+    python scripts/inference_server.py --bench [--requests N] [--batch B]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from rdflib import BNode, Graph, URIRef
+
+from run_inference import (
+    DYADS,
+    get_evidence_for_frame,
+    get_frame_occurrences,
+    infer_dyads,
+    load_graph,
+    materialize_inference,
+    namespaces,
+)
+
+PL = namespaces().PL
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_MAX_BATCH = 1000
+NTRIPLES = "application/n-triples"
+# Absolute IRI: a scheme, then no characters N-Triples cannot carry in <...>
+ABSOLUTE_IRI = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:[^\x00-\x20<>"{}|^`\\]*$')
+
+
+class RequestError(Exception):
+    """Invalid request payload (reported as HTTP 400)."""
+
+
+def finite_decimal(value, what: str) -> Decimal:
+    """Parse a score or threshold; NaN and infinities are rejected."""
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise RequestError(f"invalid {what}: {value!r}")
+    if not number.is_finite():
+        raise RequestError(f"{what} must be finite: {value!r}")
+    return number
+
+
+def absolute_iri(value, what: str) -> str:
+    """Check that a JSON id is a string holding an absolute IRI."""
+    if not isinstance(value, str) or not ABSOLUTE_IRI.match(value):
+        raise RequestError(f"{what} must be an absolute IRI: {value!r}")
+    return value
+
+
+class InferenceService:
+    """Resident ontology graph plus compiled dyad table."""
+
+    def __init__(self, base_dir: Path, threshold: Decimal,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 max_batch: int = DEFAULT_MAX_BATCH):
+        self.threshold = threshold
+        self.max_batch = max_batch
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.ontology = load_graph(base_dir)
+
+        # Emotion local names declared in the resident ontology
+        self.emotions = {
+            str(s).split("#")[-1] for s in self.ontology.subjects() if str(s).startswith(str(PL))
+        }
+        missing = {name for pair in DYADS.values() for name in pair} - self.emotions
+        if missing:
+            raise ValueError(f"Dyad components not declared in ontology: {sorted(missing)}")
+
+    # ------------------------------------------------------------------
+    # Batch parsing
+    # ------------------------------------------------------------------
+
+    def parse_json(self, payload: dict) -> List[Tuple[str, Dict[str, Tuple[URIRef, Decimal]]]]:
+        """Convert a JSON batch to [(situation, evidence_map)]."""
+        if not isinstance(payload, dict):
+            raise RequestError("request body must be a JSON object")
+        situations = payload.get("situations")
+        if not isinstance(situations, list):
+            raise RequestError("'situations' must be a list")
+        self._check_batch(len(situations))
+
+        batch = []
+        for sit in situations:
+            if not isinstance(sit, dict) or "id" not in sit:
+                raise RequestError("each situation must be an object with an 'id'")
+            sit_id = absolute_iri(sit["id"], "situation id")
+            evidence = sit.get("evidence", [])
+            if not isinstance(evidence, list):
+                raise RequestError(f"'evidence' of {sit_id} must be a list")
+            evidence_map: Dict[str, Tuple[URIRef, Decimal]] = {}
+            for ev in evidence:
+                if not isinstance(ev, dict) or "emotion" not in ev or "score" not in ev:
+                    raise RequestError(f"invalid evidence in {sit_id}: {ev}")
+                emotion_name = str(ev["emotion"]).split("#")[-1]
+                score = finite_decimal(ev["score"], f"score in {sit_id}")
+                if emotion_name not in self.emotions:
+                    raise RequestError(f"unknown emotion: {ev['emotion']}")
+                ev_uri = URIRef(absolute_iri(ev["id"], "evidence id")) if "id" in ev else BNode()
+                # Keep max score for each emotion
+                if emotion_name not in evidence_map or score > evidence_map[emotion_name][1]:
+                    evidence_map[emotion_name] = (ev_uri, score)
+            batch.append((sit_id, evidence_map))
+        return batch
+
+    def parse_ntriples(self, body: str) -> List[Tuple[str, Dict[str, Tuple[URIRef, Decimal]]]]:
+        """Convert an N-Triples batch to [(situation, evidence_map)]."""
+        g = Graph()
+        try:
+            g.parse(data=body, format="nt")
+        except Exception as e:
+            raise RequestError(f"invalid N-Triples: {e}")
+        frame_occs = get_frame_occurrences(g)
+        self._check_batch(len(frame_occs))
+        try:
+            batch = [(term_id(fo), get_evidence_for_frame(g, fo)) for fo in frame_occs]
+        except InvalidOperation:
+            raise RequestError("every pl:score must be a number")
+        for sit, evidence_map in batch:
+            for _, score in evidence_map.values():
+                finite_decimal(str(score), f"score in {sit}")
+        return batch
+
+    def _check_batch(self, size: int) -> None:
+        if size > self.max_batch:
+            raise RequestError(f"batch of {size} exceeds limit of {self.max_batch}")
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+
+    def infer(self, batch, threshold: Optional[Decimal] = None) -> List[tuple]:
+        """Return [(situation, [(dyad_name, score, ev1, ev2)])] for a batch."""
+        th = self.threshold if threshold is None else threshold
+        return [(sit, infer_dyads(self.ontology, sit, evidence_map, th)) for sit, evidence_map in batch]
+
+    def to_json(self, results, threshold: Decimal) -> dict:
+        return {
+            "threshold": str(threshold),
+            "results": [
+                {
+                    "situation": sit,
+                    "dyads": [
+                        {
+                            "dyad": str(PL[dyad_name]),
+                            "score": str(score),
+                            "derivedFrom": [term_id(ev1), term_id(ev2)],
+                            "method": "min-threshold",
+                        }
+                        for dyad_name, score, ev1, ev2 in inferred
+                    ],
+                }
+                for sit, inferred in results
+            ],
+        }
+
+    def to_ntriples(self, results, threshold: Decimal) -> str:
+        g = Graph()
+        for sit, inferred in results:
+            for dyad_name, score, ev1, ev2 in inferred:
+                situation = BNode(sit[2:]) if sit.startswith("_:") else URIRef(sit)
+                materialize_inference(g, situation, dyad_name, score, ev1, ev2, threshold)
+        return g.serialize(format="nt")
+
+
+def term_id(term) -> str:
+    """String form of an evidence term for JSON output."""
+    return f"_:{term}" if isinstance(term, BNode) else str(term)
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """HTTP front end for InferenceService."""
+
+    service: InferenceService
+    verbose = False
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "triples": len(self.service.ontology),
+            "dyads": len(DYADS),
+            "threshold": str(self.service.threshold),
+        })
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/infer":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        if not self.service.slots.acquire(blocking=False):
+            self._send_json(503, {"error": "too many concurrent requests"})
+            return
+        try:
+            self._handle_infer(url)
+        finally:
+            self.service.slots.release()
+
+    def _handle_infer(self, url) -> None:
+        start = time.perf_counter()
+        content_type = self.headers.get("Content-Type", "application/json")
+
+        try:
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                raise RequestError("invalid Content-Length")
+            if length < 0:
+                raise RequestError("invalid Content-Length")
+            body = self.rfile.read(length).decode("utf-8")
+
+            threshold = None
+            if content_type.startswith(NTRIPLES):
+                batch = self.service.parse_ntriples(body)
+            else:
+                payload = json.loads(body)
+                batch = self.service.parse_json(payload)
+                if "threshold" in payload:
+                    threshold = finite_decimal(payload["threshold"], "threshold")
+            query = parse_qs(url.query)
+            if "th" in query:
+                threshold = finite_decimal(query["th"][0], "threshold")
+        except (RequestError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        th = self.service.threshold if threshold is None else threshold
+        results = self.service.infer(batch, th)
+
+        if self.headers.get("Accept", "").startswith(NTRIPLES):
+            self._send(200, NTRIPLES, self.service.to_ntriples(results, th).encode("utf-8"))
+        else:
+            response = self.service.to_json(results, th)
+            response["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self._send_json(200, response)
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        self._send(status, "application/json", json.dumps(payload).encode("utf-8"))
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(service: InferenceService, host: str, port: int, verbose: bool = False) -> ThreadingHTTPServer:
+    """Create an HTTP server bound to the given service."""
+    handler = type("BoundInferenceHandler", (InferenceHandler,), {"service": service, "verbose": verbose})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def run_benchmark(service: InferenceService, n_requests: int, batch_size: int) -> None:
+    """Start the server in-process and measure request latency."""
+    from http.client import HTTPConnection
+
+    server = make_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+
+    # Batch built from the sample situations, repeated to the requested size
+    pairs = list(DYADS.values())
+    situations = []
+    for i in range(batch_size):
+        e1, e2 = pairs[i % len(pairs)]
+        situations.append({
+            "id": f"http://example.org/data#bench{i}",
+            "evidence": [
+                {"id": f"http://example.org/data#bench{i}_ev1", "emotion": e1, "score": 0.8},
+                {"id": f"http://example.org/data#bench{i}_ev2", "emotion": e2, "score": 0.5},
+            ],
+        })
+    body = json.dumps({"situations": situations})
+
+    conn = HTTPConnection(host, port)
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        conn.request("POST", "/infer", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status != 200:
+            raise RuntimeError(f"benchmark request failed: HTTP {response.status}")
+    conn.close()
+    server.shutdown()
+
+    latencies.sort()
+    total_s = sum(latencies) / 1000
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    print("\n" + "=" * 50)
+    print("Inference Server Latency Benchmark")
+    print("=" * 50)
+    print(f"Requests: {n_requests}, batch size: {batch_size}")
+    print(f"p50: {median(latencies):.3f} ms")
+    print(f"p95: {pct(0.95):.3f} ms")
+    print(f"p99: {pct(0.99):.3f} ms")
+    print(f"max: {latencies[-1]:.3f} ms")
+    print(f"Throughput: {n_requests * batch_size / total_s:.0f} situations/s")
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plutchik Dyad Inference Server")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--th", type=float, default=0.4, help="Default threshold (default: 0.4)")
+    parser.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT,
+                        help=f"Concurrent /infer requests before HTTP 503 (default: {DEFAULT_MAX_CONCURRENT})")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help=f"Situations per request (default: {DEFAULT_MAX_BATCH})")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    parser.add_argument("--bench", action="store_true", help="Run the latency benchmark and exit")
+    parser.add_argument("--requests", type=int, default=200, help="Benchmark requests (default: 200)")
+    parser.add_argument("--batch", type=int, default=10, help="Benchmark batch size (default: 10)")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+
+    print("Plutchik Dyad Inference Server")
+    start = time.perf_counter()
+    service = InferenceService(base_dir, Decimal(str(args.th)), args.max_concurrent, args.max_batch)
+    print(f"Ontology loaded: {len(service.ontology)} triples in {time.perf_counter() - start:.2f} s")
+
+    if args.bench:
+        run_benchmark(service, args.requests, args.batch)
+        return
+
+    server = make_server(service, args.host, args.port, args.verbose)
+    print(f"Listening on http://{args.host}:{args.port} (POST /infer, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
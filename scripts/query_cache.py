@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+SPARQL Query Cache
+
+Query execution helper for repeated runs of sparql/*.rq and sparql/cq/*.rq
+against an unchanged graph. Two caches are kept:
+
+- prepared queries: each query file is parsed and translated to SPARQL
+  algebra once (re-prepared only when the file changes on disk)
+- results: a bounded LRU keyed by query text, bindings and graph version
+
+The graph version is bumped by a store event handler whenever a triple is
+added (loading, inference), and the triple count is part of the key so
+removals also invalidate cached results.
+
+Usage:
+    python scripts/query_cache.py [QUERY_FILE ...] [--repeat N] [--size N]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from rdflib import Graph
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.sparql import Query
+from rdflib.query import Result
+from rdflib.store import TripleAddedEvent
+
+DEFAULT_CACHE_SIZE = 128
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss/eviction counters for one cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+
+class GraphVersion:
+    """Counter bumped on every triple added to a graph's store."""
+
+    def __init__(self, g: Graph):
+        self.value = 0
+        g.store.dispatcher.subscribe(TripleAddedEvent, self._on_added)
+
+    def _on_added(self, event) -> None:
+        self.value += 1
+
+
+class QueryExecutor:
+    """Runs SPARQL queries against a graph with prepared-query and result caches."""
+
+    def __init__(self, g: Graph, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.g = g
+        self.maxsize = maxsize
+        self.version = GraphVersion(g)
+        # path -> (mtime_ns, query text, prepared query)
+        self._prepared: Dict[Path, Tuple[int, str, Query]] = {}
+        self._results: "OrderedDict[Hashable, Result]" = OrderedDict()
+        self.prepared_stats = CacheStats()
+        self.result_stats = CacheStats()
+
+    def graph_key(self) -> Tuple[int, int]:
+        """Current graph version: (additions seen, triple count)."""
+        return (self.version.value, len(self.g))
+
+    def prepare(self, path: Path) -> Tuple[str, Query]:
+        """Return (text, prepared query) for a query file, parsing it at most once."""
+        path = Path(path).resolve()
+        mtime = path.stat().st_mtime_ns
+        cached = self._prepared.get(path)
+        if cached is not None and cached[0] == mtime:
+            self.prepared_stats.hits += 1
+            return cached[1], cached[2]
+
+        self.prepared_stats.misses += 1
+        text = path.read_text(encoding="utf-8")
+        prepared = prepareQuery(text)
+        self._prepared[path] = (mtime, text, prepared)
+        return text, prepared
+
+    def query_file(self, path: Path, initBindings: Optional[dict] = None) -> Result:
+        """Run a query file, serving repeated runs from the result cache."""
+        text, prepared = self.prepare(path)
+        return self._execute(text, prepared, initBindings)
+
+    def query(self, text: str, initNs: Optional[dict] = None,
+              initBindings: Optional[dict] = None) -> Result:
+        """Run a query string, serving repeated runs from the result cache."""
+        return self._execute(text, None, initBindings, initNs)
+
+    def _execute(self, text: str, prepared: Optional[Query],
+                 initBindings: Optional[dict], initNs: Optional[dict] = None) -> Result:
+        bindings = frozenset((initBindings or {}).items())
+        namespaces = frozenset((initNs or {}).items())
+        key = (text, bindings, namespaces, self.graph_key())
+
+        if key in self._results:
+            self.result_stats.hits += 1
+            self._results.move_to_end(key)
+            return self._results[key]
+
+        self.result_stats.misses += 1
+        result = self.g.query(prepared if prepared is not None else text,
+                              initNs=initNs or {}, initBindings=initBindings)
+        if result.type == "SELECT":
+            # Materialize the lazy bindings so the result can be re-iterated
+            result.bindings
+
+        self._results[key] = result
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+            self.result_stats.evictions += 1
+        return result
+
+    def clear(self) -> None:
+        """Drop all cached results (prepared queries are kept)."""
+        self._results.clear()
+
+    def print_stats(self) -> None:
+        """Print cache statistics."""
+        print(f"{'Cache':<12} {'Hits':<8} {'Misses':<8} {'Evictions':<10} {'Hit rate':<8}")
+        print("-" * 50)
+        for name, stats in (("prepared", self.prepared_stats), ("results", self.result_stats)):
+            print(f"{name:<12} {stats.hits:<8} {stats.misses:<8} {stats.evictions:<10} "
+                  f"{stats.hit_rate * 100:.1f}%")
+        print(f"Cached results: {len(self._results)}/{self.maxsize}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached SPARQL query execution")
+    parser.add_argument("queries", nargs="*", help="Query files (default: sparql/cq/*.rq)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query (default: 5)")
+    parser.add_argument("--size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"Result cache size (default: {DEFAULT_CACHE_SIZE})")
+    parser.add_argument("--th", type=float, default=0.4, help="Inference threshold (default: 0.4)")
+    args = parser.parse_args()
+
+    from run_inference import load_graph, run_inference
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+
+    if args.queries:
+        query_files = [Path(q) if Path(q).is_absolute() else base_dir / q for q in args.queries]
+    else:
+        query_files = sorted((base_dir / "sparql" / "cq").glob("*.rq"))
+
+    print("SPARQL Query Cache")
+    print(f"Queries: {len(query_files)}, repeat: {args.repeat}, cache size: {args.size}")
+    print("-" * 50)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        g = load_graph(base_dir)
+        executor = QueryExecutor(g, maxsize=args.size)
+        run_inference(g, Decimal(str(args.th)))
+
+    print(f"\n{'Query':<32} {'Rows':<6} {'First (ms)':<12} {'Cached (ms)':<12}")
+    print("-" * 64)
+    for path in query_files:
+        timings: List[float] = []
+        rows = 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = executor.query_file(path)
+            rows = len(result) if result.type != "ASK" else 1
+            timings.append((time.perf_counter() - start) * 1000)
+        cached = min(timings[1:]) if len(timings) > 1 else float("nan")
+        print(f"{path.name:<32} {rows:<6} {timings[0]:<12.3f} {cached:<12.3f}")
+
+    print()
+    executor.print_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+EFO-BE Relation Closure Index
+
+EFO-BE encodes be:moreIntenseThan, be:hasAntidote and be:hasImpediment as
+owl:Restriction blank nodes (C rdfs:subClassOf [owl:onProperty P;
+owl:someValuesFrom D]), which sparql/02-04 recover by pattern matching on
+every run. This build step extracts them once into adjacency lists over
+interned class IDs and precomputes the transitive closure of properties
+declared owl:TransitiveProperty (moreIntenseThan). Each row of the closure
+is an int bitset, so "is X more intense than Y" is one bit test.
+
+The index is persisted as JSON and rebuilt when data/BE_iswc.ttl changes.
+Edges are the direct restrictions matched by the SPARQL queries; they are
+not inherited along rdfs:subClassOf.
+
+Usage:
+    python scripts/relation_index.py build
+    python scripts/relation_index.py query Fury [Annoyance]
+    python scripts/relation_index.py check
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+INDEX_VERSION = 1
+
+BE_NS = "http://www.ontologydesignpatterns.org/ont/emotions/BasicEmotions.owl#"
+
+# Restriction-encoded relations (local names) and the query recovering each
+RELATIONS: Dict[str, str] = {
+    "moreIntenseThan": "02_intensity_relations.rq",
+    "hasAntidote": "03_optional_relations.rq",
+    "hasImpediment": "04_impediments.rq",
+}
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_bits(mask: int):
+    """Positions of the set bits of an int, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def transitive_closure(adjacency: List[List[int]]) -> List[int]:
+    """Reachability bitset per node (paths of length >= 1), by Warshall's algorithm."""
+    closure = [sum(1 << succ for succ in set(succs)) for succs in adjacency]
+    for k in range(len(closure)):
+        via = closure[k]
+        bit = 1 << k
+        for i, row in enumerate(closure):
+            if row & bit:
+                closure[i] = row | via
+    return closure
+
+
+@dataclass
+class RelationIndex:
+    """Interned EFO-BE classes, relation adjacency and transitive closures."""
+    source_sha256: str = ""
+    nodes: List[str] = field(default_factory=list)
+    ids: Dict[str, int] = field(default_factory=dict)
+    edges: Dict[str, List[List[int]]] = field(default_factory=dict)
+    transitive: Dict[str, List[int]] = field(default_factory=dict)
+
+    def node_id(self, name: str) -> Optional[int]:
+        """ID for a class IRI or EFO-BE local name (None if unknown)."""
+        node = self.ids.get(name)
+        if node is None and not name.startswith("http"):
+            node = self.ids.get(BE_NS + name)
+        return node
+
+    def holds(self, relation: str, a: str, b: str) -> bool:
+        """True if relation(a, b), following the closure for transitive relations."""
+        i, j = self.node_id(a), self.node_id(b)
+        if i is None or j is None:
+            return False
+        if relation in self.transitive:
+            return bool(self.transitive[relation][i] >> j & 1)
+        return j in self.edges[relation][i]
+
+    def more_intense(self, a: str, b: str) -> bool:
+        """True if a is (transitively) more intense than b."""
+        return self.holds("moreIntenseThan", a, b)
+
+    def related(self, relation: str, a: str, closed: bool = True) -> List[str]:
+        """Classes related to a (the closure for transitive relations unless closed=False)."""
+        i = self.node_id(a)
+        if i is None:
+            return []
+        if closed and relation in self.transitive:
+            return [self.nodes[j] for j in iter_bits(self.transitive[relation][i])]
+        return [self.nodes[j] for j in self.edges[relation][i]]
+
+    def inverse(self, relation: str, b: str, closed: bool = True) -> List[str]:
+        """Classes a with relation(a, b), e.g. lessIntenseThan via moreIntenseThan."""
+        j = self.node_id(b)
+        if j is None:
+            return []
+        if closed and relation in self.transitive:
+            rows = self.transitive[relation]
+            return [self.nodes[i] for i in range(len(rows)) if rows[i] >> j & 1]
+        return [self.nodes[i] for i, succ in enumerate(self.edges[relation]) if j in succ]
+
+    def pairs(self, relation: str, closed: bool = False) -> List[Tuple[str, str]]:
+        """All (a, b) pairs of a relation, sorted."""
+        out = []
+        for i, name in enumerate(self.nodes):
+            out.extend((name, b) for b in self.related(relation, name, closed))
+        return sorted(out)
+
+    def cycles(self, relation: str) -> List[str]:
+        """Classes that reach themselves through a transitive relation."""
+        rows = self.transitive.get(relation, [])
+        return [self.nodes[i] for i in range(len(rows)) if rows[i] >> i & 1]
+
+    def save(self, path: Path) -> None:
+        """Write the index to a JSON file (closure rows as hex strings)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "source_sha256": self.source_sha256,
+                "nodes": self.nodes,
+                "edges": self.edges,
+                "transitive": {rel: [format(row, "x") for row in rows]
+                               for rel, rows in self.transitive.items()},
+            }, f)
+
+    @classmethod
+    def load(cls, path: Path) -> "RelationIndex":
+        """Read an index written by save()."""
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported relation index: {path}")
+        nodes = data["nodes"]
+        return cls(
+            data["source_sha256"], nodes, {name: i for i, name in enumerate(nodes)},
+            data["edges"],
+            {rel: [int(row, 16) for row in rows] for rel, rows in data["transitive"].items()},
+        )
+
+
+def build_relation_index(be_path: Path) -> RelationIndex:
+    """Extract restriction-encoded relations from EFO-BE and close transitive ones."""
+    from rdflib import Graph, URIRef
+    from rdflib.namespace import OWL, RDF, RDFS
+
+    g = Graph()
+    g.parse(be_path, format="turtle")
+
+    index = RelationIndex(source_sha256=file_sha256(be_path))
+    pairs: Dict[str, List[Tuple[int, int]]] = {rel: [] for rel in RELATIONS}
+
+    def intern(term) -> int:
+        name = str(term)
+        if name not in index.ids:
+            index.ids[name] = len(index.nodes)
+            index.nodes.append(name)
+        return index.ids[name]
+
+    for restriction in g.subjects(RDF.type, OWL.Restriction):
+        prop = g.value(restriction, OWL.onProperty)
+        filler = g.value(restriction, OWL.someValuesFrom)
+        if prop is None or not str(prop).startswith(BE_NS) or not isinstance(filler, URIRef):
+            continue
+        relation = str(prop)[len(BE_NS):]
+        if relation not in RELATIONS:
+            continue
+        for cls in g.subjects(RDFS.subClassOf, restriction):
+            if isinstance(cls, URIRef):
+                pairs[relation].append((intern(cls), intern(filler)))
+
+    n = len(index.nodes)
+    for relation, rel_pairs in pairs.items():
+        adjacency: List[List[int]] = [[] for _ in range(n)]
+        for a, b in sorted(set(rel_pairs)):
+            adjacency[a].append(b)
+        index.edges[relation] = adjacency
+        if (URIRef(BE_NS + relation), RDF.type, OWL.TransitiveProperty) in g:
+            index.transitive[relation] = transitive_closure(adjacency)
+    return index
+
+
+def load_or_build(be_path: Path, index_path: Path, verbose: bool = True) -> RelationIndex:
+    """Load the persisted index, rebuilding it if missing or if EFO-BE has changed."""
+    sha = file_sha256(be_path)
+    if index_path.exists():
+        try:
+            index = RelationIndex.load(index_path)
+            if index.source_sha256 == sha:
+                return index
+        except (ValueError, KeyError, json.JSONDecodeError):
+            pass
+    if verbose:
+        print(f"Building relation index from: {be_path}")
+    index = build_relation_index(be_path)
+    index.save(index_path)
+    return index
+
+
+def check_consistency(index: RelationIndex, be_path: Path, sparql_dir: Path) -> bool:
+    """Compare direct edges with sparql/02-04 and the closure with a naive fixpoint."""
+    from rdflib import Graph
+
+    g = Graph()
+    g.parse(be_path, format="turtle")
+
+    all_match = True
+    print(f"{'Relation':<18} {'Edges':<7} {'Closure':<9} {'SPARQL (ms)':<13} {'Index (us)':<12} {'Result':<8}")
+    print("-" * 70)
+    for relation, query_file in RELATIONS.items():
+        query = (sparql_dir / query_file).read_text(encoding="utf-8")
+        start = time.perf_counter()
+        expected = sorted((str(a), str(b)) for a, b in g.query(query))
+        sparql_ms = (time.perf_counter() - start) * 1000
+
+        direct = index.pairs(relation)
+        closed = index.pairs(relation, closed=True)
+
+        # Naive fixpoint over the SPARQL rows
+        reference = set(expected)
+        if relation in index.transitive:
+            while True:
+                extra = {(a, d) for a, b in reference for c, d in reference if b == c} - reference
+                if not extra:
+                    break
+                reference |= extra
+
+        start = time.perf_counter()
+        for a, b in closed:
+            index.holds(relation, a, b)
+        index_us = (time.perf_counter() - start) * 1e6 / max(len(closed), 1)
+
+        ok = direct == expected and closed == sorted(reference)
+        all_match &= ok
+        print(f"{relation:<18} {len(direct):<7} {len(closed):<9} {sparql_ms:<13.1f} "
+              f"{index_us:<12.2f} {'PASS' if ok else 'FAIL':<8}")
+    print("(Index: mean per-pair holds() lookup)")
+    return all_match
+
+
+def local(name: str) -> str:
+    return name[len(BE_NS):] if name.startswith(BE_NS) else name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EFO-BE relation closure index")
+    parser.add_argument("--be", type=str, default="data/BE_iswc.ttl", help="EFO-BE module file")
+    parser.add_argument("--index", type=str, default="output/relation_index.json", help="Index file path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("build", help="(Re)build the relation index")
+
+    p_query = sub.add_parser("query", help="Relations of a class, or between two classes")
+    p_query.add_argument("a", help="Class IRI or EFO-BE local name")
+    p_query.add_argument("b", nargs="?", help="Second class")
+
+    sub.add_parser("check", help="Compare the index with the SPARQL queries")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+
+    def resolve(p: str) -> Path:
+        return Path(p) if Path(p).is_absolute() else base_dir / p
+
+    be_path = resolve(args.be)
+    index_path = resolve(args.index)
+    if not be_path.exists():
+        print(f"Error: EFO-BE file not found: {be_path}")
+        sys.exit(2)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = build_relation_index(be_path)
+        index.save(index_path)
+        elapsed = time.perf_counter() - start
+        print(f"Relation index: {len(index.nodes)} classes ({elapsed:.2f} s)")
+        for relation in RELATIONS:
+            closed = len(index.pairs(relation, closed=True))
+            print(f"  {relation:<18} {len(index.pairs(relation))} edges"
+                  + (f", {closed} in closure" if relation in index.transitive else ""))
+            for name in index.cycles(relation):
+                print(f"  Warning: {local(name)} is {relation} itself (cycle)")
+        print(f"Written to: {index_path}")
+        return
+
+    index = load_or_build(be_path, index_path)
+
+    if args.command == "query":
+        if index.node_id(args.a) is None:
+            print(f"Unknown class: {args.a}")
+            sys.exit(1)
+        if args.b:
+            if index.node_id(args.b) is None:
+                print(f"Unknown class: {args.b}")
+                sys.exit(1)
+            for relation in RELATIONS:
+                print(f"{relation}({args.a}, {args.b}): {index.holds(relation, args.a, args.b)}")
+            return
+        for relation in RELATIONS:
+            targets = index.related(relation, args.a)
+            print(f"{relation}: {', '.join(local(t) for t in targets) or '(none)'}")
+        print(f"lessIntenseThan: {', '.join(local(t) for t in index.inverse('moreIntenseThan', args.a)) or '(none)'}")
+        return
+
+    print("Relation Index Check")
+    print("=" * 70)
+    ok = check_consistency(index, be_path, base_dir / "sparql")
+    print()
+    print("All relations match!" if ok else "Some relations differ!")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Offline owl:imports Closure Resolver
+
+Walks the owl:imports closure of the ontology modules through the
+catalog-v001.xml files in imports/, modules/, output/ and data/, without
+any network access:
+- catalog entries are resolved relative to their catalog; absolute
+  file:/ URIs that do not exist here (Protégé writes machine-specific
+  paths) are relocated to the same trailing path under the repository
+- the closure is predicted with a regex scan (extract_imports.py), the
+  files are parsed in parallel worker processes and merged; owl:imports
+  found only after parsing are resolved in a further round
+- the merged graph is cached in output/import_closure.pickle, keyed by the
+  SHA-256 of every closure member and catalog, so repeated loads skip
+  parsing entirely
+
+Imports that no catalog maps to an existing file are reported as unresolved
+and skipped.
+
+Usage:
+    python scripts/resolve_imports.py [ROOT ...] [--jobs N] [--no-cache] [--out FILE] [--bench]
+
+ROOT is a file path or an ontology IRI (default: the EFO modules, EmoCore,
+EFO-BE and BET).
+"""
+
+import argparse
+import gc
+import hashlib
+import os
+import pickle
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from rdflib import Graph
+from rdflib.namespace import OWL, RDF
+
+from extract_imports import extract_imports_owl, extract_imports_ttl
+
+CACHE_VERSION = 2
+
+# Catalogs in resolution order (the referencing file's own catalog goes first)
+CATALOG_DIRS = ["imports", "modules", "output", "data"]
+CATALOG_NAME = "catalog-v001.xml"
+CATALOG_NS = "{urn:oasis:names:tc:entity:xmlns:xml:catalog}"
+
+# Roots of the full ontology load
+DEFAULT_ROOTS = [
+    "data/EmoCore_iswc.ttl",
+    "data/BE_iswc.ttl",
+    "modules/EFO-PlutchikDyad.ttl",
+    "data/BasicEmotionTriggers_iswc.ttl",
+]
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sniff_format(path: Path) -> str:
+    """rdflib parser format from the file contents (DUL.owl is Turtle despite its suffix)."""
+    if path.suffix.lower() == ".nt":
+        return "nt"
+    with open(path, "rb") as f:
+        head = f.read(512).lstrip()
+    if head.startswith(b"<?xml") or head.startswith(b"<rdf:RDF"):
+        return "xml"
+    return "turtle"
+
+
+def scan_imports(path: Path) -> List[str]:
+    """Predict a file's owl:imports with a regex scan (no parsing)."""
+    content = path.read_text(encoding="utf-8")
+    return extract_imports_ttl(content) + extract_imports_owl(content)
+
+
+# ----------------------------------------------------------------------
+# Catalogs
+# ----------------------------------------------------------------------
+
+def relocate(path: Path, base_dir: Path) -> Optional[Path]:
+    """
+    Map a missing absolute path to the same trailing path under base_dir,
+    e.g. /Users/.../efo_repro/modules/X.ttl -> base_dir/modules/X.ttl.
+    At least one directory component must match.
+    """
+    parts = path.parts[1:]
+    for i in range(len(parts) - 1):
+        candidate = base_dir.joinpath(*parts[i:])
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def read_catalog(catalog_path: Path, base_dir: Path) -> List[Tuple[str, Path]]:
+    """Return the (name IRI, local file) entries of a catalog that exist locally."""
+    entries = []
+    root = ET.parse(catalog_path).getroot()
+    for uri in root.iter(f"{CATALOG_NS}uri"):
+        name, target = uri.get("name"), uri.get("uri")
+        if not name or not target:
+            continue
+        if target.startswith("file:"):
+            path = Path(unquote(urlparse(target).path))
+        else:
+            path = catalog_path.parent / unquote(target)
+        if not path.exists():
+            path = relocate(path, base_dir) if path.is_absolute() else None
+        if path is not None:
+            entries.append((name, path.resolve()))
+    return entries
+
+
+@dataclass
+class CatalogSet:
+    """IRI -> local file mappings from every catalog, per catalog directory."""
+    base_dir: Path
+    catalogs: Dict[Path, Dict[str, Path]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, base_dir: Path) -> "CatalogSet":
+        catalog_set = cls(base_dir)
+        for name in CATALOG_DIRS:
+            path = base_dir / name / CATALOG_NAME
+            if path.exists():
+                mapping: Dict[str, Path] = {}
+                for iri, local in read_catalog(path, base_dir):
+                    mapping.setdefault(iri, local)  # first entry wins
+                catalog_set.catalogs[path.parent.resolve()] = mapping
+        return catalog_set
+
+    @property
+    def paths(self) -> List[Path]:
+        return [d / CATALOG_NAME for d in self.catalogs]
+
+    def resolve(self, iri: str, from_dir: Optional[Path] = None) -> Optional[Path]:
+        """Local file for an ontology IRI, preferring the catalog in from_dir."""
+        order = list(self.catalogs)
+        if from_dir is not None and from_dir in self.catalogs:
+            order.remove(from_dir)
+            order.insert(0, from_dir)
+        for d in order:
+            if iri in self.catalogs[d]:
+                return self.catalogs[d][iri]
+        return None
+
+
+# ----------------------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------------------
+
+def parse_module(path: str, fmt: str) -> Tuple[Graph, List[str], List[str]]:
+    """Parse one module; return (graph, owl:imports IRIs, declared ontology IRIs)."""
+    g = Graph()
+    g.parse(path, format=fmt)
+    imports = [str(o) for o in g.objects(None, OWL.imports)]
+    ontologies = [str(s) for s in g.subjects(RDF.type, OWL.Ontology)]
+    return g, imports, ontologies
+
+
+def parse_all(paths: List[Path], jobs: int) -> List[Tuple[Graph, List[str], List[str]]]:
+    """Parse modules, in worker processes when jobs > 1."""
+    args = [(str(p), sniff_format(p)) for p in paths]
+    if jobs <= 1 or len(paths) <= 1:
+        return [parse_module(*a) for a in args]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+        return list(pool.map(parse_module, *zip(*args)))
+
+
+@dataclass
+class Closure:
+    """A resolved import closure."""
+    graph: Graph
+    files: Dict[str, str]               # closure member (repo-relative) -> sha256
+    ontologies: Dict[str, str]          # ontology IRI -> closure member
+    unresolved: List[Tuple[str, str]]   # (importing file, IRI)
+    from_cache: bool = False
+
+
+def repo_path(path: Path, base_dir: Path) -> str:
+    """Path relative to the repository root (absolute if outside it)."""
+    try:
+        return path.relative_to(base_dir).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def resolve_closure(roots: List[Path], catalogs: CatalogSet, jobs: int, base_dir: Path) -> Closure:
+    """Walk and parse the owl:imports closure of the root files."""
+    # Predict the closure from a regex scan so one parallel round covers it
+    predicted: List[Path] = []
+    queue = list(roots)
+    while queue:
+        path = queue.pop(0)
+        if path in predicted:
+            continue
+        predicted.append(path)
+        for iri in scan_imports(path):
+            target = catalogs.resolve(iri, path.parent)
+            if target is not None and target not in predicted:
+                queue.append(target)
+
+    graph = Graph()
+    parsed: List[Path] = []
+    ontologies: Dict[str, str] = {}
+    pending_imports: List[Tuple[Path, str]] = []
+    unresolved: List[Tuple[str, str]] = []
+
+    batch = predicted
+    while batch:
+        for path, (g, imports, declared) in zip(batch, parse_all(batch, jobs)):
+            graph += g
+            for prefix, ns in g.namespaces():
+                graph.bind(prefix, ns, override=False)
+            parsed.append(path)
+            for iri in declared:
+                ontologies.setdefault(iri, repo_path(path, base_dir))
+            pending_imports.extend((path, iri) for iri in imports)
+
+        # Imports the regex scan missed, or that map to files not yet parsed
+        batch = []
+        for path, iri in pending_imports:
+            if iri in ontologies:
+                continue
+            target = catalogs.resolve(iri, path.parent)
+            if target is None:
+                unresolved.append((repo_path(path, base_dir), iri))
+            elif target not in parsed and target not in batch:
+                batch.append(target)
+        pending_imports = []
+
+    files = {repo_path(p, base_dir): file_sha256(p) for p in parsed}
+    return Closure(graph, files, ontologies, unresolved)
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+
+def cache_key(roots: List[Path], catalogs: CatalogSet, base_dir: Path) -> Dict[str, object]:
+    """
+    Inputs the cache entry depends on besides the closure members. Paths are
+    repo-relative so the key does not depend on where the checkout lives.
+    """
+    return {
+        "version": CACHE_VERSION,
+        "roots": [repo_path(p, base_dir) for p in roots],
+        "catalogs": {repo_path(p, base_dir): file_sha256(p) for p in catalogs.paths},
+    }
+
+
+def load_cached(cache_path: Path, key: Dict[str, object], base_dir: Path) -> Optional[Closure]:
+    """Return the cached closure if its key and every member's hash still match."""
+    if not cache_path.exists():
+        return None
+    # Unpickling allocates ~10^5 small objects; cyclic GC passes over them
+    # otherwise cost more than the load itself
+    gc.disable()
+    try:
+        with open(cache_path, "rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        # Unreadable, truncated or pickled by another rdflib/Python version:
+        # rebuild rather than fail
+        return None
+    finally:
+        gc.enable()
+    if not isinstance(data, dict) or data.get("key") != key:
+        return None
+    for path, sha in data["files"].items():
+        member = base_dir / path
+        if not member.exists() or file_sha256(member) != sha:
+            return None
+    return Closure(data["graph"], data["files"], data["ontologies"],
+                   data["unresolved"], from_cache=True)
+
+
+def save_cache(cache_path: Path, key: Dict[str, object], closure: Closure) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, "wb") as f:
+        pickle.dump({
+            "key": key,
+            "files": closure.files,
+            "ontologies": closure.ontologies,
+            "unresolved": closure.unresolved,
+            "graph": closure.graph,
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_closure(base_dir: Path, roots: Optional[List[str]] = None, jobs: Optional[int] = None,
+                 cache_path: Optional[Path] = None, use_cache: bool = True) -> Closure:
+    """
+    Load the import closure of roots (file paths or ontology IRIs), from the
+    cache when it is still valid.
+    """
+    base_dir = base_dir.resolve()
+    catalogs = CatalogSet.load(base_dir)
+    root_paths = []
+    for root in roots or DEFAULT_ROOTS:
+        if re.match(r"^https?://", root):
+            path = catalogs.resolve(root)
+            if path is None:
+                raise FileNotFoundError(f"No catalog entry for: {root}")
+        else:
+            path = Path(root) if Path(root).is_absolute() else base_dir / root
+            if not path.exists():
+                raise FileNotFoundError(f"Root file not found: {path}")
+        root_paths.append(path.resolve())
+
+    cache_path = cache_path or base_dir / "output" / "import_closure.pickle"
+    key = cache_key(root_paths, catalogs, base_dir)
+    if use_cache:
+        cached = load_cached(cache_path, key, base_dir)
+        if cached is not None:
+            return cached
+
+    closure = resolve_closure(root_paths, catalogs, jobs or os.cpu_count() or 1, base_dir)
+    if use_cache:
+        save_cache(cache_path, key, closure)
+    return closure
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline owl:imports closure resolver")
+    parser.add_argument("roots", nargs="*", help="Root files or ontology IRIs (default: EFO modules)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Parser worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the cache")
+    parser.add_argument("--cache", type=str, default="output/import_closure.pickle", help="Cache file path")
+    parser.add_argument("--out", type=str, help="Also write the merged closure (.ttl, .nt, optionally .gz)")
+    parser.add_argument("--bench", action="store_true", help="Compare serial, parallel and cached loads")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+    cache_path = Path(args.cache) if Path(args.cache).is_absolute() else base_dir / args.cache
+
+    print("Import Closure Resolver")
+    print("-" * 50)
+
+    try:
+        start = time.perf_counter()
+        closure = load_closure(base_dir, args.roots, args.jobs, cache_path, not args.no_cache)
+        elapsed = time.perf_counter() - start
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    print(f"Closure ({len(closure.files)} files):")
+    for path, sha in closure.files.items():
+        print(f"  {path}  sha256:{sha[:12]}")
+    print("Ontologies:")
+    for iri, path in closure.ontologies.items():
+        print(f"  {iri} -> {path}")
+    if closure.unresolved:
+        print("Unresolved imports (skipped):")
+        for path, iri in closure.unresolved:
+            print(f"  {iri} (from {Path(path).name})")
+    source = "cache" if closure.from_cache else f"parsed, {args.jobs} jobs"
+    print(f"\nTotal triples: {len(closure.graph)} ({source}, {elapsed:.3f} s)")
+
+    if args.out:
+        from stream_writer import StreamingWriter
+
+        out_path = Path(args.out) if Path(args.out).is_absolute() else base_dir / args.out
+        with StreamingWriter(out_path, closure.graph.namespaces()) as writer:
+            writer.write_graph(closure.graph)
+        print(f"Written to: {out_path}")
+
+    if args.bench:
+        print("\n" + "=" * 50)
+        print("Load benchmark")
+        print("=" * 50)
+        runs = [
+            ("serial parse", dict(jobs=1, use_cache=False)),
+            (f"parallel parse ({args.jobs} jobs)", dict(jobs=args.jobs, use_cache=False)),
+            ("cache", dict(jobs=args.jobs, cache_path=cache_path)),
+        ]
+        load_closure(base_dir, args.roots, args.jobs, cache_path)  # make sure the cache is warm
+        for label, kwargs in runs:
+            start = time.perf_counter()
+            result = load_closure(base_dir, args.roots, **kwargs)
+            print(f"  {label:<28} {time.perf_counter() - start:.3f} s  ({len(result.graph)} triples)")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@
 #   ./run_fuseki.sh load      # Load EFO ontologies into dataset
 #   ./run_fuseki.sh stop      # Stop Fuseki server
 #   ./run_fuseki.sh query     # Run validation queries
+#   ./run_fuseki.sh bench     # Create the in-memory efo_bench dataset (engine_bench.py)
 
 set -e
 
@@ -20,6 +21,7 @@ IMPORTS_DIR="$BASE_DIR/imports"
 SPARQL_DIR="$BASE_DIR/sparql"
 
 DATASET_NAME="efo"
+BENCH_DATASET_NAME="efo_bench"
 FUSEKI_PORT="${FUSEKI_PORT:-3030}"
 FUSEKI_URL="http://localhost:$FUSEKI_PORT"
 
@@ -103,6 +105,14 @@ run_queries() {
     done
 }
 
+create_bench_dataset() {
+    echo "Creating in-memory dataset /$BENCH_DATASET_NAME for engine_bench.py..."
+    curl -s -X POST "$FUSEKI_URL/\$/datasets" \
+        --data-urlencode "dbName=$BENCH_DATASET_NAME" \
+        --data-urlencode "dbType=mem" \
+        && echo " OK" || echo " FAILED"
+}
+
 stop_fuseki() {
     echo "Stopping Fuseki server..."
     pkill -f "fuseki-server" 2>/dev/null || echo "No running Fuseki process found."
@@ -119,16 +129,20 @@ case "${1:-help}" in
     query)
         run_queries
         ;;
+    bench)
+        create_bench_dataset
+        ;;
     stop)
         stop_fuseki
         ;;
     *)
-        echo "Usage: $0 {start|load|query|stop}"
+        echo "Usage: $0 {start|load|query|bench|stop}"
         echo ""
         echo "Commands:"
         echo "  start  - Start Fuseki server with in-memory dataset"
         echo "  load   - Load EFO ontologies (EmoCore, BE) into Fuseki"
         echo "  query  - Run validation SPARQL queries"
+        echo "  bench  - Create the efo_bench dataset used by engine_bench.py"
         echo "  stop   - Stop Fuseki server"
         ;;
 esac
@@ -6,24 +6,33 @@ Performs min-threshold aggregation to infer compound emotions (dyads)
 from basic emotion evidence scores.
 
 Usage:
-    python scripts/run_inference.py [--th THRESHOLD] [--out OUTPUT_FILE]
+    python scripts/run_inference.py [--th THRESHOLD] [--out OUTPUT_FILE] [--index INDEX_FILE] [--stream]
+
+rdflib is imported inside the functions that use it, so argument parsing
+and --help do not pay its import time. Other scripts get the rdflib
+Namespace objects from namespaces().
 """
 
+from __future__ import annotations
+
 import argparse
 import sys
 from decimal import Decimal
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Set, Tuple
 
-from rdflib import BNode, Graph, Literal, Namespace, URIRef
-from rdflib.namespace import OWL, RDF, RDFS, XSD
+if TYPE_CHECKING:
+    from rdflib import BNode, Graph, Namespace, URIRef
 
-# Namespaces
-PL = Namespace("http://example.org/efo/plutchik#")
-EMO = Namespace("http://www.ontologydesignpatterns.org/ont/emotions/EmoCore.owl#")
-FSCHEMA = Namespace("https://w3id.org/framester/schema/")
-EX = Namespace("http://example.org/data#")
-OUTPUT_ONTOLOGY = URIRef("http://example.org/efo/plutchik/inference")
+# Namespace IRIs, keyed by the field names of Namespaces
+NAMESPACE_IRIS: Dict[str, str] = {
+    "PL": "http://example.org/efo/plutchik#",
+    "EMO": "http://www.ontologydesignpatterns.org/ont/emotions/EmoCore.owl#",
+    "FSCHEMA": "https://w3id.org/framester/schema/",
+    "EX": "http://example.org/data#",
+}
+OUTPUT_ONTOLOGY_IRI = "http://example.org/efo/plutchik/inference"
 
 # Dyad definitions: dyad_name -> (component1, component2)
 DYADS: Dict[str, Tuple[str, str]] = {
@@ -40,19 +49,42 @@ DYADS: Dict[str, Tuple[str, str]] = {
 }
 
 
-def load_graph(base_dir: Path) -> Graph:
-    """Load all required TTL files into a single graph."""
-    g = Graph()
+class Namespaces(NamedTuple):
+    """rdflib Namespace objects for NAMESPACE_IRIS."""
+    PL: Namespace
+    EMO: Namespace
+    FSCHEMA: Namespace
+    EX: Namespace
+
 
-    # Bind namespaces
-    g.bind("pl", PL)
-    g.bind("emo", EMO)
-    g.bind("fschema", FSCHEMA)
-    g.bind("ex", EX)
+@lru_cache(maxsize=None)
+def namespaces() -> Namespaces:
+    """Return the rdflib namespaces (imports rdflib on the first call)."""
+    from rdflib import Namespace
+
+    return Namespaces(**{name: Namespace(iri) for name, iri in NAMESPACE_IRIS.items()})
+
+
+def bind_namespaces(g: Graph) -> None:
+    """Bind output prefixes (only needed before serialization)."""
+    from rdflib.namespace import OWL, RDFS, XSD
+
+    ns = namespaces()
+    g.bind("pl", ns.PL)
+    g.bind("emo", ns.EMO)
+    g.bind("fschema", ns.FSCHEMA)
+    g.bind("ex", ns.EX)
     g.bind("owl", OWL)
     g.bind("rdfs", RDFS)
     g.bind("xsd", XSD)
 
+
+def load_graph(base_dir: Path) -> Graph:
+    """Load all required TTL files into a single graph."""
+    from rdflib import Graph
+
+    g = Graph()
+
     # Required files
     required_files = [
         base_dir / "data" / "EmoCore_iswc.ttl",
@@ -87,7 +119,7 @@ def get_frame_occurrences(g: Graph) -> List[URIRef]:
         ?fo a fschema:FrameOccurrence .
     }
     """
-    results = g.query(query, initNs={"fschema": FSCHEMA})
+    results = g.query(query, initNs={"fschema": namespaces().FSCHEMA})
     return [row.fo for row in results]
 
 
@@ -97,27 +129,21 @@ def get_evidence_for_frame(g: Graph, frame_occ: URIRef) -> Dict[str, Tuple[URIRe
     Returns dict: emotion_local_name -> (evidence_uri, score)
     If multiple evidence for same emotion, keep the one with max score.
     """
-    query = """
-    SELECT ?ev ?emotion ?score WHERE {
-        ?fo pl:hasEvidence ?ev .
-        ?ev pl:emotion ?emotion .
-        ?ev pl:score ?score .
-    }
-    """
-    results = g.query(query, initNs={"pl": PL}, initBindings={"fo": frame_occ})
-
+    PL = namespaces().PL
     evidence_map: Dict[str, Tuple[URIRef, Decimal]] = {}
 
-    for row in results:
-        emotion_uri = row.emotion
-        # Extract local name from URI
-        emotion_name = str(emotion_uri).split("#")[-1]
-        score = Decimal(str(row.score))
-        ev_uri = row.ev
+    # Fold while walking the triples rather than materializing every
+    # duplicate (ev, emotion, score) row through SPARQL
+    for ev_uri in g.objects(frame_occ, PL.hasEvidence):
+        for emotion_uri in g.objects(ev_uri, PL.emotion):
+            # Extract local name from URI
+            emotion_name = str(emotion_uri).split("#")[-1]
+            for score_lit in g.objects(ev_uri, PL.score):
+                score = Decimal(str(score_lit))
 
-        # Keep max score for each emotion
-        if emotion_name not in evidence_map or score > evidence_map[emotion_name][1]:
-            evidence_map[emotion_name] = (ev_uri, score)
+                # Keep max score for each emotion
+                if emotion_name not in evidence_map or score > evidence_map[emotion_name][1]:
+                    evidence_map[emotion_name] = (ev_uri, score)
 
     return evidence_map
 
@@ -158,7 +184,7 @@ def materialize_inference(
     ev1: URIRef,
     ev2: URIRef,
     threshold: Decimal,
-) -> None:
+) -> BNode:
     """
     Add inferred dyad evidence to the graph.
 
@@ -166,7 +192,13 @@ def materialize_inference(
     - pl:satisfies link from FrameOccurrence to dyad
     - New DyadEvidence node with score, derivedFrom, method
     - pl:hasEvidence link from FrameOccurrence to new evidence
+
+    Returns the new DyadEvidence node.
     """
+    from rdflib import BNode, Literal
+    from rdflib.namespace import RDF, XSD
+
+    PL = namespaces().PL
     dyad_uri = PL[dyad_name]
 
     # (A) Add satisfies
@@ -186,12 +218,17 @@ def materialize_inference(
     # (C) Link evidence to FrameOccurrence
     g.add((frame_occ, PL.hasEvidence, new_ev))
 
+    return new_ev
 
-def run_inference(g: Graph, threshold: Decimal) -> Dict[str, Set[str]]:
+
+def run_inference(g: Graph, threshold: Decimal, writer=None) -> Dict[str, Set[str]]:
     """
     Run dyad inference on all FrameOccurrences.
+    If a StreamingWriter (see stream_writer.py) is given, each situation's
+    inferred triples are written as soon as they are produced.
     Returns dict: frame_local_name -> set of inferred dyad names.
     """
+    PL = namespaces().PL
     frame_occs = get_frame_occurrences(g)
     print(f"\nFound {len(frame_occs)} FrameOccurrence(s)")
 
@@ -209,10 +246,14 @@ def run_inference(g: Graph, threshold: Decimal) -> Dict[str, Set[str]]:
         inference_results[fo_name] = set()
 
         if inferred:
+            written = []
             for dyad_name, dyad_score, ev1, ev2 in inferred:
                 print(f"  -> Inferred: {dyad_name} (score={dyad_score})")
-                materialize_inference(g, fo, dyad_name, dyad_score, ev1, ev2, threshold)
+                new_ev = materialize_inference(g, fo, dyad_name, dyad_score, ev1, ev2, threshold)
                 inference_results[fo_name].add(dyad_name)
+                written.append((PL[dyad_name], dyad_score, ev1, ev2, new_ev))
+            if writer is not None:
+                writer.write_situation(fo, written)
         else:
             print(f"  -> No dyad inferred (threshold={threshold})")
 
@@ -273,6 +314,9 @@ def main():
     parser = argparse.ArgumentParser(description="Plutchik Dyad Inference")
     parser.add_argument("--th", type=float, default=0.4, help="Threshold (default: 0.4)")
     parser.add_argument("--out", type=str, default="output/out.ttl", help="Output file path")
+    parser.add_argument("--index", type=str, help="Also write the CQ index (see cq_index.py) to this path")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write output incrementally (.ttl, .nt, optionally .gz; see stream_writer.py)")
     args = parser.parse_args()
 
     threshold = Decimal(str(args.th))
@@ -289,21 +333,44 @@ def main():
     # Load graph
     g = load_graph(base_dir)
 
-    # Run inference
-    results = run_inference(g, threshold)
-
     # Output
     out_path = base_dir / args.out
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Add ontology IRI declaration for Protege compatibility
-    g.add((OUTPUT_ONTOLOGY, RDF.type, OWL.Ontology))
-    g.add((OUTPUT_ONTOLOGY, RDFS.label, Literal("EFO Plutchik Dyad Inference Results")))
-    g.add((OUTPUT_ONTOLOGY, RDFS.comment, Literal(f"Inferred dyad emotions using min-threshold aggregation (TH={threshold})")))
+    from rdflib import Literal, URIRef
+    from rdflib.namespace import OWL, RDF, RDFS
+
+    bind_namespaces(g)
+    output_ontology = URIRef(OUTPUT_ONTOLOGY_IRI)
+    g.add((output_ontology, RDF.type, OWL.Ontology))
+    g.add((output_ontology, RDFS.label, Literal("EFO Plutchik Dyad Inference Results")))
+    g.add((output_ontology, RDFS.comment, Literal(f"Inferred dyad emotions using min-threshold aggregation (TH={threshold})")))
+
+    if args.stream:
+        # Stream the loaded graph, then each situation's inferences as produced
+        from stream_writer import StreamingWriter
+
+        print(f"\nStreaming output to: {out_path}")
+        with StreamingWriter(out_path, g.namespaces()) as writer:
+            writer.write_graph(g)
+            results = run_inference(g, threshold, writer)
+        print(f"\nOutput written: {writer.count} triples")
+    else:
+        # Run inference
+        results = run_inference(g, threshold)
+
+        print(f"\nWriting output to: {out_path}")
+        g.serialize(destination=str(out_path), format="turtle")
+        print(f"Output written: {len(g)} triples")
+
+    # CQ index (materialized view for sparql/cq/*.rq)
+    if args.index:
+        from cq_index import build_index
 
-    print(f"\nWriting output to: {out_path}")
-    g.serialize(destination=str(out_path), format="turtle")
-    print(f"Output written: {len(g)} triples")
+        index_path = base_dir / args.index
+        build_index(g).save(index_path)
+        print(f"CQ index written to: {index_path}")
 
     # Self-test
     if not run_self_test(results):
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+
+Measures cold-start cost of each script entry point with `--help`:
+- import time, from `python -X importtime` (sum of top-level imports,
+  minus those of a bare interpreter start)
+- wall-clock time of the whole process (best of N runs)
+
+Entry points with a budget fail the check when their import time exceeds
+it, so heavy dependencies (rdflib, pyshacl) creeping back into module load
+is caught.
+
+Usage:
+    python scripts/startup_bench.py [--runs N]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Import-time budget per entry point (ms above a bare interpreter start).
+# rdflib alone costs ~200 ms, so these catch it creeping back into module load.
+# None: entry point needs rdflib at startup; reported only.
+IMPORT_BUDGETS_MS: Dict[str, Optional[float]] = {
+    "run_inference.py": 80.0,
+    "validate_shacl.py": 80.0,
+    "extract_imports.py": 80.0,
+    "threshold_sweep.py": None,
+    "cq_index.py": None,
+    "query_cache.py": None,
+    "inference_server.py": None,
+    "engine_bench.py": None,
+    "evidence_agg.py": 80.0,
+    "resolve_imports.py": None,
+    "relation_index.py": 80.0,
+    "startup_bench.py": 80.0,
+}
+
+
+def measure_import_time(args: List[str]) -> Tuple[float, List[Tuple[float, str]]]:
+    """
+    Run `python -X importtime ARGS...` and return
+    (total import ms, [(ms, module)] for top-level imports, slowest first).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True, text=True,
+    )
+    top_level = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # Nested imports are indented by two extra spaces per level
+        if len(module) - len(module.lstrip()) == 1:
+            top_level.append((int(cumulative) / 1000, module.strip()))
+    top_level.sort(reverse=True)
+    return sum(ms for ms, _ in top_level), top_level
+
+
+def measure_wall_time(script: Path, runs: int) -> float:
+    """Best-of-N wall-clock time (ms) for `python SCRIPT --help`."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(script), "--help"], capture_output=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def baseline_wall_time(runs: int) -> float:
+    """Best-of-N wall-clock time (ms) for a bare interpreter start."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], capture_output=True, check=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark for script entry points")
+    parser.add_argument("--runs", type=int, default=5, help="Wall-clock runs per script (default: 5)")
+    parser.add_argument("--top", type=int, default=3, help="Slowest imports to show per script (default: 3)")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+
+    base_import_ms, _ = measure_import_time(["-c", "pass"])
+
+    print("Startup Benchmark (--help)")
+    print(f"Interpreter baseline: {baseline_wall_time(args.runs):.1f} ms wall, "
+          f"{base_import_ms:.1f} ms imports")
+    print("-" * 78)
+    print(f"{'Entry point':<24} {'Imports (ms)':<14} {'Budget (ms)':<13} {'Wall (ms)':<11} {'Result':<8}")
+    print("-" * 78)
+
+    all_passed = True
+    details = []
+    for name, budget in IMPORT_BUDGETS_MS.items():
+        script = script_dir / name
+        total_ms, top_level = measure_import_time([str(script), "--help"])
+        import_ms = total_ms - base_import_ms
+        wall_ms = measure_wall_time(script, args.runs)
+
+        if budget is None:
+            status, budget_str = "-", "-"
+        elif import_ms <= budget:
+            status, budget_str = "PASS", f"{budget:.0f}"
+        else:
+            status, budget_str = "FAIL", f"{budget:.0f}"
+            all_passed = False
+
+        print(f"{name:<24} {import_ms:<14.1f} {budget_str:<13} {wall_ms:<11.1f} {status:<8}")
+        details.append((name, top_level[:args.top]))
+
+    print("-" * 78)
+    print("\nSlowest top-level imports:")
+    for name, top_level in details:
+        print(f"  {name}: " + ", ".join(f"{module} {ms:.1f}ms" for ms, module in top_level))
+
+    print()
+    print("All budgets met!" if all_passed else "Some entry points exceed their import budget!")
+    sys.exit(0 if all_passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Streaming Turtle/N-Triples Writer
+
+Writes inference output incrementally instead of building the full
+prefix-optimized, subject-grouped Turtle document in memory with
+g.serialize(). The loaded graph is streamed one triple per line, then
+DyadEvidence blocks and pl:satisfies triples are emitted per situation as
+run_inference() produces them. Memory overhead is one situation's block.
+
+Formats (chosen from the output suffix):
+    .ttl / .ttl.gz   Turtle (prefixes, N-Triples-style base triples,
+                     grouped DyadEvidence blocks)
+    .nt  / .nt.gz    N-Triples
+
+Usage:
+    python scripts/run_inference.py --stream --out output/out.ttl.gz
+    python scripts/stream_writer.py [--out OUTPUT_FILE] [--th THRESHOLD]
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import re
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.namespace import RDF, XSD
+
+# Triples per inferred dyad (see dyad_triples)
+TRIPLES_PER_DYAD = 8
+
+# Local names that are safe to write as prefix:local
+SAFE_LOCAL_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_\-]*$")
+
+
+def output_format(path: Path) -> Tuple[str, bool]:
+    """Return (format, gzipped) for an output path: ('turtle' | 'nt', bool)."""
+    suffixes = [s.lower() for s in path.suffixes]
+    gzipped = bool(suffixes) and suffixes[-1] == ".gz"
+    if gzipped:
+        suffixes = suffixes[:-1]
+    fmt = "nt" if suffixes and suffixes[-1] == ".nt" else "turtle"
+    return fmt, gzipped
+
+
+def quote_literal(value: str) -> str:
+    """Quote a lexical form as an N-Triples/Turtle string."""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n")
+               .replace('"', '\\"').replace("\r", "\\r"))
+    return f'"{escaped}"'
+
+
+class StreamingWriter:
+    """Incremental RDF writer for inference output."""
+
+    def __init__(self, path: Path, namespaces: Iterable[Tuple[str, str]] = (),
+                 fmt: Optional[str] = None):
+        self.path = Path(path)
+        detected, self.gzipped = output_format(self.path)
+        self.fmt = fmt or detected
+        self.prefixes: Dict[str, str] = {}
+        if self.fmt == "turtle":
+            # namespace IRI -> prefix, longest namespace first for qname lookup
+            pairs = sorted(((str(ns), prefix) for prefix, ns in namespaces),
+                           key=lambda p: -len(p[0]))
+            self.prefixes = dict(pairs)
+        self.count = 0
+        self._out: Optional[TextIO] = None
+
+    def __enter__(self) -> "StreamingWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.gzipped:
+            self._out = gzip.open(self.path, "wt", encoding="utf-8")
+        else:
+            self._out = open(self.path, "w", encoding="utf-8")
+        for ns, prefix in sorted(self.prefixes.items(), key=lambda p: p[1]):
+            self._out.write(f"@prefix {prefix}: <{ns}> .\n")
+        if self.prefixes:
+            self._out.write("\n")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._out.close()
+        self._out = None
+
+    # ------------------------------------------------------------------
+    # Term formatting
+    # ------------------------------------------------------------------
+
+    def term(self, t) -> str:
+        """Format a term (prefixed names are used in Turtle only)."""
+        if isinstance(t, Literal):
+            lexical = quote_literal(str(t))
+            if t.language:
+                return f"{lexical}@{t.language}"
+            if t.datatype:
+                return f"{lexical}^^{self.term(URIRef(t.datatype))}"
+            return lexical
+        if isinstance(t, BNode):
+            return t.n3()
+        if self.prefixes:
+            iri = str(t)
+            for ns, prefix in self.prefixes.items():
+                if iri.startswith(ns) and SAFE_LOCAL_NAME.match(iri[len(ns):]):
+                    return f"{prefix}:{iri[len(ns):]}"
+        return f"<{t}>"
+
+    def _nt_term(self, t) -> str:
+        """Format a term with full IRIs (valid in both N-Triples and Turtle)."""
+        if isinstance(t, Literal):
+            lexical = quote_literal(str(t))
+            if t.language:
+                return f"{lexical}@{t.language}"
+            if t.datatype:
+                return f"{lexical}^^<{t.datatype}>"
+            return lexical
+        return t.n3()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def write_triple(self, s, p, o) -> None:
+        """Write a single triple as one line."""
+        self._out.write(f"{self._nt_term(s)} {self._nt_term(p)} {self._nt_term(o)} .\n")
+        self.count += 1
+
+    def write_graph(self, g: Graph) -> None:
+        """Stream every triple of a graph, one per line."""
+        for s, p, o in g:
+            self.write_triple(s, p, o)
+
+    def write_situation(self, frame_occ, inferred: List[tuple]) -> None:
+        """
+        Write the inference output for one situation.
+        inferred: [(dyad_uri, dyad_score, ev1, ev2, dyad_ev)], where the
+        predicates match materialize_inference() in run_inference.py.
+        """
+        from run_inference import namespaces
+
+        if not inferred:
+            return
+        PL = namespaces().PL
+
+        if self.fmt == "nt":
+            for dyad_uri, score, ev1, ev2, dyad_ev in inferred:
+                for triple in dyad_triples(frame_occ, dyad_uri, score, ev1, ev2, dyad_ev):
+                    self.write_triple(*triple)
+            return
+
+        # Turtle: one block per situation plus one block per DyadEvidence
+        t = self.term
+        objects = [f"{t(PL.satisfies)} {t(dyad_uri)}" for dyad_uri, *_ in inferred]
+        objects += [f"{t(PL.hasEvidence)} {t(dyad_ev)}" for *_, dyad_ev in inferred]
+        lines = [f"\n{t(frame_occ)} " + " ;\n    ".join(objects) + " .\n"]
+        for dyad_uri, score, ev1, ev2, dyad_ev in inferred:
+            lines.append(
+                f"\n{t(dyad_ev)} a {t(PL.DyadEvidence)} ;\n"
+                f"    {t(PL.emotion)} {t(dyad_uri)} ;\n"
+                f"    {t(PL.score)} {t(Literal(score, datatype=XSD.decimal))} ;\n"
+                f"    {t(PL.derivedFrom)} {t(ev1)}, {t(ev2)} ;\n"
+                f"    {t(PL.method)} {t(Literal('min-threshold', datatype=XSD.string))} .\n"
+            )
+        self._out.write("".join(lines))
+        self.count += TRIPLES_PER_DYAD * len(inferred)
+
+
+def dyad_triples(frame_occ, dyad_uri, score, ev1, ev2, dyad_ev) -> List[tuple]:
+    """Triples added by materialize_inference() for one inferred dyad."""
+    from run_inference import namespaces
+
+    PL = namespaces().PL
+    return [
+        (frame_occ, PL.satisfies, dyad_uri),
+        (dyad_ev, RDF.type, PL.DyadEvidence),
+        (dyad_ev, PL.emotion, dyad_uri),
+        (dyad_ev, PL.score, Literal(score, datatype=XSD.decimal)),
+        (dyad_ev, PL.derivedFrom, ev1),
+        (dyad_ev, PL.derivedFrom, ev2),
+        (dyad_ev, PL.method, Literal("min-threshold", datatype=XSD.string)),
+        (frame_occ, PL.hasEvidence, dyad_ev),
+    ]
+
+
+def parse_output(path: Path) -> Graph:
+    """Parse a (possibly gzipped) Turtle or N-Triples output file."""
+    fmt, gzipped = output_format(path)
+    g = Graph()
+    if gzipped:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            g.parse(data=f.read(), format=fmt)
+    else:
+        g.parse(path, format=fmt)
+    return g
+
+
+def main():
+    """Compare streaming output against g.serialize(): memory, time, graph equality."""
+    from rdflib.compare import isomorphic
+
+    from run_inference import bind_namespaces, load_graph, run_inference
+
+    parser = argparse.ArgumentParser(description="Streaming writer check and benchmark")
+    parser.add_argument("--out", type=str, default="output/out_stream.ttl",
+                        help="Streaming output path (.ttl, .nt, optionally .gz)")
+    parser.add_argument("--th", type=float, default=0.4, help="Threshold (default: 0.4)")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+    out_path = Path(args.out) if Path(args.out).is_absolute() else base_dir / args.out
+    threshold = Decimal(str(args.th))
+
+    print("Streaming Writer Check")
+    print(f"Output: {out_path} (format: {output_format(out_path)})")
+    print("-" * 50)
+
+    def measure(write) -> Tuple[Graph, float, float]:
+        """Load a fresh graph, then time and trace inference plus writing."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            g = load_graph(base_dir)
+        bind_namespaces(g)
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            write(g)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return g, elapsed, peak
+
+    def streaming(g: Graph) -> None:
+        with StreamingWriter(out_path, g.namespaces()) as writer:
+            writer.write_graph(g)
+            run_inference(g, threshold, writer)
+
+    def in_memory(g: Graph) -> None:
+        run_inference(g, threshold)
+        g.serialize(format="turtle")
+
+    # Warm up rdflib's SPARQL machinery so neither measurement pays for it
+    Graph().query("ASK { ?s ?p ?o }")
+
+    g, stream_s, stream_peak = measure(streaming)
+    _, serialize_s, serialize_peak = measure(in_memory)
+
+    print(f"{'Writer':<18} {'Time (s)':<10} {'Peak alloc (KB)':<16}")
+    print(f"{'streaming':<18} {stream_s:<10.3f} {stream_peak / 1024:<16.1f}")
+    print(f"{'g.serialize':<18} {serialize_s:<10.3f} {serialize_peak / 1024:<16.1f}")
+    print("(both include inference; peak excludes the loaded graph)")
+
+    parsed = parse_output(out_path)
+    same = isomorphic(parsed, g)
+    print(f"\nTriples parsed: {len(parsed)}, graph: {len(g)}")
+    print("Parsed output is isomorphic to the graph: " + ("PASS" if same else "FAIL"))
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
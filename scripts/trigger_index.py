@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Trigger Lexicon Index
+
+Precompiles the emo:triggers links in data/BasicEmotionTriggers_iswc.ttl
+(WordNet synsets, PropBank rolesets, BabelNet IDs, ConceptNet/Wiktionary
+lemmas, ...) into hash maps from trigger IRI, local ID or lemma to an
+emotion set, persisted as JSON and rebuilt when the BET file changes.
+
+A batch stage then turns a stream of annotated frame occurrences into
+scored pl:Evidence nodes (and, with --infer, DyadEvidence) without loading
+the trigger module into rdflib.
+
+EFO-BE emotions are mapped to Plutchik basic emotions (Enjoyment -> Joy).
+BET has no Trust or Anticipation triggers, so only dyads over Joy, Fear,
+Surprise, Sadness, Disgust and Anger can be inferred from trigger evidence.
+
+Input (JSON Lines, one frame occurrence per line):
+    {"id": "http://example.org/data#occ1", "triggers": ["synset-anger-noun-1", "belch.01"]}
+
+Evidence score per emotion = share of matched triggers evoking it.
+
+Usage:
+    python scripts/trigger_index.py build
+    python scripts/trigger_index.py lookup TRIGGER [TRIGGER ...]
+    python scripts/trigger_index.py evidence INPUT.jsonl --out output/evidence.nt [--infer]
+    python scripts/trigger_index.py evidence --synthetic 100000 --out /tmp/ev.nt.gz --infer
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 1
+
+EMOCORE_TRIGGERS = "http://www.ontologydesignpatterns.org/ont/emotions/EmoCore.owl#triggers"
+BE_NS = "http://www.ontologydesignpatterns.org/ont/emotions/BasicEmotions.owl#"
+
+# EFO-BE emotion -> Plutchik basic emotion (local names)
+BE_TO_PLUTCHIK: Dict[str, str] = {
+    "Anger": "Anger",
+    "Fear": "Fear",
+    "Sadness": "Sadness",
+    "Disgust": "Disgust",
+    "Enjoyment": "Joy",
+    "Surprise": "Surprise",
+}
+
+# Bit positions of emotion sets
+EMOTIONS: Tuple[str, ...] = tuple(BE_TO_PLUTCHIK.values())
+EMOTION_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(EMOTIONS)}
+
+SCORE_QUANTUM = Decimal("0.01")
+
+# synset-<lemma>-<pos>-<n>, <lemma>.<nn> (PropBank roleset)
+SYNSET_ID = re.compile(r"^synset-(.+)-(noun|verb|adjective|adverb|adjectivesatellite)-\d+$")
+ROLESET_ID = re.compile(r"^(.+)\.\d+$")
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def trigger_keys(iri: str) -> List[str]:
+    """Local ID and lemma keys (lowercased) for a trigger IRI."""
+    path = iri.split("#")[0].rstrip("/")
+    if "/conceptnet/" in path and "/c/" in path:
+        # .../c/<lang>/<lemma>[/<pos>]
+        parts = path.split("/c/", 1)[1].split("/")
+        local_id = parts[1] if len(parts) > 1 else parts[0]
+    else:
+        local_id = path.rsplit("/", 1)[-1]
+
+    keys = [local_id.lower()]
+    for pattern in (SYNSET_ID, ROLESET_ID):
+        match = pattern.match(local_id)
+        if match:
+            keys.append(match.group(1).lower())
+            break
+    return keys
+
+
+def decode_emotions(mask: int) -> List[str]:
+    """Emotion names in an emotion-set bitmask."""
+    return [name for name in EMOTIONS if mask & EMOTION_BITS[name]]
+
+
+@dataclass
+class TriggerIndex:
+    """Trigger IRI / local ID / lemma -> emotion-set bitmask."""
+    source_sha256: str = ""
+    by_iri: Dict[str, int] = field(default_factory=dict)
+    by_key: Dict[str, int] = field(default_factory=dict)
+
+    def lookup(self, trigger: str) -> int:
+        """Emotion-set bitmask for a trigger IRI, local ID or lemma (0 if unknown)."""
+        mask = self.by_iri.get(trigger)
+        if mask is None:
+            mask = self.by_key.get(trigger.lower(), 0)
+        return mask
+
+    def score(self, triggers: Iterable[str]) -> Dict[str, Decimal]:
+        """Emotion -> share of matched triggers evoking it."""
+        counts = [0] * len(EMOTIONS)
+        matched = 0
+        for trigger in triggers:
+            mask = self.lookup(trigger)
+            if not mask:
+                continue
+            matched += 1
+            for i in range(len(EMOTIONS)):
+                if mask & (1 << i):
+                    counts[i] += 1
+        if not matched:
+            return {}
+        return {
+            EMOTIONS[i]: (Decimal(c) / matched).quantize(SCORE_QUANTUM)
+            for i, c in enumerate(counts) if c
+        }
+
+    def save(self, path: Path) -> None:
+        """Write the index to a JSON file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "source_sha256": self.source_sha256,
+                "emotions": list(EMOTIONS),
+                "by_iri": self.by_iri,
+                "by_key": self.by_key,
+            }, f)
+
+    @classmethod
+    def load(cls, path: Path) -> "TriggerIndex":
+        """Read an index written by save()."""
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION or data.get("emotions") != list(EMOTIONS):
+            raise ValueError(f"Unsupported trigger index: {path}")
+        return cls(data["source_sha256"], data["by_iri"], data["by_key"])
+
+
+def build_trigger_index(bet_path: Path) -> TriggerIndex:
+    """Compile emo:triggers links from the BET module into a TriggerIndex."""
+    from rdflib import Graph, URIRef
+
+    g = Graph()
+    g.parse(bet_path, format="turtle")
+
+    index = TriggerIndex(source_sha256=file_sha256(bet_path))
+    for trigger, emotion in g.subject_objects(URIRef(EMOCORE_TRIGGERS)):
+        name = BE_TO_PLUTCHIK.get(str(emotion)[len(BE_NS):]) if str(emotion).startswith(BE_NS) else None
+        if name is None:
+            continue
+        bit = EMOTION_BITS[name]
+        iri = str(trigger)
+        index.by_iri[iri] = index.by_iri.get(iri, 0) | bit
+        for key in trigger_keys(iri):
+            index.by_key[key] = index.by_key.get(key, 0) | bit
+    return index
+
+
+def load_or_build(bet_path: Path, index_path: Path, verbose: bool = True) -> TriggerIndex:
+    """Load the persisted index, rebuilding it if missing or if BET has changed."""
+    sha = file_sha256(bet_path)
+    if index_path.exists():
+        try:
+            index = TriggerIndex.load(index_path)
+            if index.source_sha256 == sha:
+                return index
+        except (ValueError, KeyError, json.JSONDecodeError):
+            pass
+    if verbose:
+        print(f"Building trigger index from: {bet_path}")
+    index = build_trigger_index(bet_path)
+    index.save(index_path)
+    return index
+
+
+def read_occurrences(path: str) -> Iterator[Tuple[str, List[str]]]:
+    """Yield (occurrence id, triggers) from a JSON Lines file ('-' for stdin)."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {line_no}: invalid JSON: {e}")
+            if not isinstance(record, dict) or "id" not in record:
+                raise ValueError(f"line {line_no}: expected an object with an 'id'")
+            triggers = record.get("triggers", [])
+            if not isinstance(triggers, list):
+                raise ValueError(f"line {line_no}: 'triggers' must be a list")
+            yield str(record["id"]), [str(t) for t in triggers]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def synthetic_occurrences(index: TriggerIndex, n: int, per_occ: int, seed: int = 0) -> Iterator[Tuple[str, List[str]]]:
+    """Yield n generated occurrences drawing triggers from the index."""
+    rng = random.Random(seed)
+    keys = sorted(index.by_iri)
+    for i in range(n):
+        yield f"occ{i}", rng.sample(keys, per_occ)
+
+
+def generate_evidence(index: TriggerIndex, occurrences: Iterable[Tuple[str, List[str]]],
+                      writer, threshold: Optional[Decimal] = None) -> Dict[str, int]:
+    """
+    Write FrameOccurrence and pl:Evidence triples for each occurrence.
+    If a threshold is given, dyads are inferred from the evidence and the
+    DyadEvidence is written as well (same output as run_inference.py).
+    Returns counters.
+    """
+    from rdflib import BNode, Literal, URIRef
+    from rdflib.namespace import RDF, XSD
+
+    from run_inference import infer_dyads, namespaces
+
+    EX, FSCHEMA, PL = namespaces().EX, namespaces().FSCHEMA, namespaces().PL
+    stats = {"occurrences": 0, "evidence": 0, "dyads": 0}
+    for occ_id, triggers in occurrences:
+        occ = URIRef(occ_id) if ":" in occ_id else EX[occ_id]
+        writer.write_triple(occ, RDF.type, FSCHEMA.FrameOccurrence)
+
+        evidence_map = {}
+        for name, score in index.score(triggers).items():
+            ev = URIRef(f"{occ}_ev_{name.lower()}")
+            writer.write_triple(occ, PL.hasEvidence, ev)
+            writer.write_triple(ev, RDF.type, PL.Evidence)
+            writer.write_triple(ev, PL.emotion, PL[name])
+            writer.write_triple(ev, PL.score, Literal(score, datatype=XSD.decimal))
+            evidence_map[name] = (ev, score)
+        stats["occurrences"] += 1
+        stats["evidence"] += len(evidence_map)
+
+        if threshold is not None:
+            inferred = infer_dyads(None, occ, evidence_map, threshold)
+            writer.write_situation(occ, [
+                (PL[dyad_name], dyad_score, ev1, ev2, BNode())
+                for dyad_name, dyad_score, ev1, ev2 in inferred
+            ])
+            stats["dyads"] += len(inferred)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trigger Lexicon Index")
+    parser.add_argument("--bet", type=str, default="data/BasicEmotionTriggers_iswc.ttl",
+                        help="BasicEmotionTriggers file")
+    parser.add_argument("--index", type=str, default="output/trigger_index.json", help="Index file path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("build", help="(Re)build the trigger index")
+
+    p_lookup = sub.add_parser("lookup", help="Look up triggers")
+    p_lookup.add_argument("triggers", nargs="+", help="Trigger IRIs, local IDs or lemmas")
+
+    p_ev = sub.add_parser("evidence", help="Generate pl:Evidence from annotated frame occurrences")
+    p_ev.add_argument("input", nargs="?", help="JSON Lines input ('-' for stdin)")
+    p_ev.add_argument("--out", type=str, default="output/trigger_evidence.nt",
+                      help="Output path (.ttl, .nt, optionally .gz)")
+    p_ev.add_argument("--infer", action="store_true", help="Also infer dyads from the evidence")
+    p_ev.add_argument("--th", type=float, default=0.4, help="Threshold for --infer (default: 0.4)")
+    p_ev.add_argument("--synthetic", type=int, help="Generate N random occurrences instead of reading input")
+    p_ev.add_argument("--per-occ", type=int, default=4, help="Triggers per synthetic occurrence (default: 4)")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    base_dir = script_dir.parent
+
+    def resolve(p: str) -> Path:
+        return Path(p) if Path(p).is_absolute() else base_dir / p
+
+    bet_path = resolve(args.bet)
+    index_path = resolve(args.index)
+    if not bet_path.exists():
+        print(f"Error: BET file not found: {bet_path}")
+        sys.exit(2)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = build_trigger_index(bet_path)
+        index.save(index_path)
+        print(f"Trigger index: {len(index.by_iri)} IRIs, {len(index.by_key)} IDs/lemmas "
+              f"({time.perf_counter() - start:.2f} s)")
+        print(f"Written to: {index_path}")
+        return
+
+    start = time.perf_counter()
+    index = load_or_build(bet_path, index_path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    if args.command == "lookup":
+        for trigger in args.triggers:
+            emotions = decode_emotions(index.lookup(trigger))
+            print(f"{trigger}\t{', '.join(emotions) if emotions else '(none)'}")
+        return
+
+    from stream_writer import StreamingWriter
+    from run_inference import NAMESPACE_IRIS
+
+    if args.synthetic:
+        occurrences = synthetic_occurrences(index, args.synthetic, args.per_occ)
+    elif args.input:
+        occurrences = read_occurrences(args.input if args.input == "-" else str(resolve(args.input)))
+    else:
+        parser.error("evidence needs an INPUT file or --synthetic N")
+
+    out_path = resolve(args.out)
+    namespaces = [("pl", NAMESPACE_IRIS["PL"]), ("ex", NAMESPACE_IRIS["EX"]),
+                  ("fschema", NAMESPACE_IRIS["FSCHEMA"]),
+                  ("rdf", "http://www.w3.org/1999/02/22-rdf-syntax-ns#"),
+                  ("xsd", "http://www.w3.org/2001/XMLSchema#")]
+    threshold = Decimal(str(args.th)) if args.infer else None
+
+    print(f"Trigger index loaded in {load_ms:.1f} ms")
+    start = time.perf_counter()
+    try:
+        with StreamingWriter(out_path, namespaces) as writer:
+            stats = generate_evidence(index, occurrences, writer, threshold)
+    except ValueError as e:
+        out_path.unlink(missing_ok=True)
+        print(f"Error: {e}")
+        sys.exit(2)
+    elapsed = time.perf_counter() - start
+
+    print(f"Occurrences: {stats['occurrences']}, evidence: {stats['evidence']}, dyads: {stats['dyads']}")
+    print(f"Triples written: {writer.count} to {out_path}")
+    print(f"Throughput: {stats['occurrences'] / elapsed if elapsed else 0:.0f} occurrences/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,30 +7,28 @@ Reference: EFO-PlutchikDyad paper, Appendix E
 
 Usage:
     python scripts/validate_shacl.py [--data DATA_FILE] [--shapes SHAPES_FILE]
+
+rdflib and pyshacl are imported inside the stages that use them, so
+argument parsing and --help do not pay their import time.
 """
 
+from __future__ import annotations
+
 import argparse
+import importlib.util
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-try:
-    from pyshacl import validate
-except ImportError:
-    print("Error: pyshacl is required. Install with: pip install pyshacl")
-    sys.exit(1)
-
-from rdflib import Graph, Namespace
-
-# Namespaces
-PL = Namespace("http://example.org/efo/plutchik#")
-FSCHEMA = Namespace("https://w3id.org/framester/schema/")
+if TYPE_CHECKING:
+    from rdflib import Graph
 
 
 def load_data_graph(base_dir: Path, data_file: str = None) -> Graph:
     """Load data graph with ontology and instance data."""
+    from rdflib import Graph
+
     g = Graph()
-    g.bind("pl", PL)
-    g.bind("fschema", FSCHEMA)
 
     # Load ontology module
     ontology_path = base_dir / "modules" / "EFO-PlutchikDyad.ttl"
@@ -64,6 +62,8 @@ def load_data_graph(base_dir: Path, data_file: str = None) -> Graph:
 
 def load_shapes_graph(base_dir: Path, shapes_file: str = None) -> Graph:
     """Load SHACL shapes graph."""
+    from rdflib import Graph
+
     sg = Graph()
 
     if shapes_file:
@@ -90,6 +90,8 @@ def run_validation(data_graph: Graph, shapes_graph: Graph, inference: bool = Fal
     Returns:
         (conforms, results_graph, results_text)
     """
+    from pyshacl import validate
+
     conforms, results_graph, results_text = validate(
         data_graph,
         shacl_graph=shapes_graph,
@@ -139,6 +141,10 @@ def main():
     print(f"Reference: EFO-PlutchikDyad paper, Appendix E")
     print("-" * 50)
 
+    if importlib.util.find_spec("pyshacl") is None:
+        print("Error: pyshacl is required. Install with: pip install pyshacl")
+        sys.exit(1)
+
     try:
         # Load graphs
         data_graph = load_data_graph(base_dir, args.data)